@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+from contextlib import redirect_stdout
+from time import time
+
+from hmo.constraints import is_state_possible
+from hmo.deadline import start_deadline_timer
+from hmo.loader import load_instance, instance_files
+from hmo.model import Constants, Variables
+from hmo.moves import assign_group
+from hmo.preprocess import prune_requests
+from hmo.scoring import score_a, score_b, score_c, score_d, score_e
+from hmo.search import solve
+
+# instance -> (variables, constants) after loading and pruning; every request is solved in a forked
+# copy, so the loaded state itself never changes
+LOADED = {}
+
+
+# Parse:
+
+def parse_arguments():
+    parse = argparse.ArgumentParser(
+        description='Keep instances loaded and solve requests sent over a Unix domain socket.\n'
+                    'A request is one JSON line: {"instance": "i2", "award_activity": [1, 2, 4],\n'
+                    '"award_student": 1, "minmax_penalty": 1, "timeout": 30,\n'
+                    '"warm_start": [[student_id, activity_id, group_id], ...]} (warm_start optional).\n'
+                    'The reply is one JSON line with the score breakdown and the changed\n'
+                    '[student_id, activity_id, new_group_id] rows, or {"error": ...}.',
+        formatter_class=argparse.RawTextHelpFormatter)
+
+    parse.add_argument(
+        '-socket', '--socket',
+        dest='socket', default='hmo.sock',
+        help='Socket path.')
+
+    parse.add_argument(
+        '-instances', '--instances',
+        dest='instances', default='i2,i3,i4,i5',
+        help='Instance directories under -data-dir to load, comma separated.')
+
+    parse.add_argument(
+        '-data-dir', '--data-dir',
+        dest='data_dir', default='data',
+        help='Directory with one sub-directory of input files per instance.')
+
+    args = parse.parse_args()
+    return args
+
+
+# Solve:
+
+def parse_warm_start_row(row, variables: Variables, constants: Constants):
+    # (student_id, activity_id, group_id) of a warm start row, every row is checked before any is applied
+    if not isinstance(row, list) or len(row) != 3:
+        raise ValueError("warm start row is not [student_id, activity_id, group_id]: " + str(row))
+    student_id, activity_id, group_id = (str(x) for x in row)
+    if activity_id not in constants.activities_by_student.get(student_id, ()):
+        raise ValueError("warm start row for an unknown student and activity: " + str(row))
+    if group_id not in constants.groups_by_activity[activity_id] or group_id not in variables.groups_dict:
+        raise ValueError("warm start row with a group not of its activity: " + str(row))
+    return student_id, activity_id, group_id
+
+
+def solve_request(request):
+    instance = request["instance"]
+    if instance not in LOADED:
+        raise ValueError("unknown instance " + str(instance))
+    variables, constants = LOADED[instance]
+    constants.award_activity = [int(x) for x in request["award_activity"]]
+    constants.award_student = int(request["award_student"])
+    constants.minmax_penalty = int(request["minmax_penalty"])
+
+    if not isinstance(request.get("warm_start", []), list):
+        raise ValueError("warm_start is not a list of [student_id, activity_id, group_id] rows")
+    warm_start = [parse_warm_start_row(row, variables, constants) for row in request.get("warm_start", [])]
+    for student_id, activity_id, group_id in warm_start:
+        assign_group(student_id, activity_id, group_id, variables, constants)
+        variables.global_moves_made.add((student_id, activity_id))
+    if not is_state_possible(variables, constants):
+        raise ValueError("warm start is not a feasible assignment")
+
+    constants.program_start = time()
+    constants.timeout = float(request["timeout"])
+    timer = start_deadline_timer(constants)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        solve(variables, constants)
+    timer.cancel()
+
+    scores = [score_a(variables, constants), score_b(variables, constants), score_c(variables, constants),
+              score_d(variables, constants), score_e(variables, constants)]
+    return {
+        "instance": instance,
+        "score": scores[0] + scores[1] + scores[2] - scores[3] - scores[4],
+        "upper_bound": constants.upper_bound,
+        "a": scores[0], "b": scores[1], "c": scores[2], "d": scores[3], "e": scores[4],
+        "possible": is_state_possible(variables, constants),
+        "seconds": time() - constants.program_start,
+        "assignment": [[student["student_id"], student["activity_id"], student["new_group_id"]]
+                       for student in variables.student_activity_dict.values()
+                       if student["new_group_id"] != student["group_id"]],
+    }
+
+
+class SolveHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            response = solve_request(json.loads(self.rfile.readline()))
+        except KeyError as error:
+            response = {"error": "missing field " + str(error)}
+        except (ValueError, TypeError) as error:
+            response = {"error": str(error)}
+        self.wfile.write((json.dumps(response) + "\n").encode())
+        print("request for ", response.get("instance"), ": ", response.get("score", response.get("error")))
+
+
+class ForkingUnixStreamServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+# Client:
+
+def send_request(socket_path, request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode())
+        with client.makefile('rb') as reply:
+            return json.loads(reply.readline())
+
+
+def main():
+    args = parse_arguments()
+
+    for instance in args.instances.split(","):
+        load_start = time()
+        constants = Constants()
+        variables = Variables()
+        load_instance(*instance_files(args.data_dir, instance), variables, constants)
+        prune_requests(variables, constants)
+        constants.request_targets = {key: tuple(group_ids) for key, group_ids in variables.moves.items()}
+        constants.output_reserve = 0.2  # the reply is one JSON line, no file to write
+        LOADED[instance] = (variables, constants)
+        print("loaded ", instance, " in ", time() - load_start, " seconds.")
+
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    with ForkingUnixStreamServer(args.socket, SolveHandler) as server:
+        print("listening on ", args.socket)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import heapq
+from typing import Dict, List, Tuple
+
+from hmo.constraints import is_move_possible
+from hmo.model import Constants, Variables
+from hmo.moves import make_move
+from hmo.scoring import move_delta, student_swap_stats
+
+
+# Batch evaluation of single moves:
+
+def evaluate_single_moves(variables: Variables, constants: Constants,
+                          keys=None) -> List[Tuple[int, str, str, str]]:
+    """Exact score delta of every feasible pending (student, activity, group) move, best first."""
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    student_groups_dict = variables.student_groups_dict
+    moves = variables.moves
+    if variables.group_index is not None:
+        full_groups = variables.group_index.full_groups
+        min_groups = variables.group_index.min_groups
+    else:
+        full_groups = {group_id for group_id, group in groups_dict.items() if group["students_cnt"] >= group["max"]}
+        min_groups = {group_id for group_id, group in groups_dict.items() if group["students_cnt"] <= group["min"]}
+    swap_stats: Dict[str, Tuple[int, int]] = {}
+
+    candidates = []
+    for student_id, activity_id in (moves if keys is None else keys):
+        old_group_id = student_activity_dict[(student_id, activity_id)]["new_group_id"]
+        if old_group_id in min_groups:
+            continue
+        old_group = groups_dict[old_group_id]
+        student_groups = student_groups_dict[student_id]
+        for new_group_id in moves[(student_id, activity_id)]:
+            if new_group_id in full_groups:
+                continue
+            new_group = groups_dict[new_group_id]
+            if not is_move_possible(student_id, activity_id, old_group, new_group, student_groups,
+                                    variables, constants):
+                continue
+            if student_id not in swap_stats:
+                swap_stats[student_id] = student_swap_stats(student_id, variables, constants)
+            delta = move_delta(student_id, activity_id, old_group_id, new_group_id, swap_stats[student_id],
+                               variables, constants)
+            candidates.append((delta, student_id, activity_id, new_group_id))
+    candidates.sort(key=lambda candidate: -candidate[0])
+    return candidates
+
+
+# Regret-ordered construction:
+
+def key_options(student_id, activity_id, variables: Variables, constants: Constants) -> List[Tuple[int, str]]:
+    # improving (delta, group) options of one pending move, best first
+    old_group_id = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+    old_group = variables.groups_dict[old_group_id]
+    student_groups = variables.student_groups_dict[student_id]
+    swap_stats = student_swap_stats(student_id, variables, constants)
+    options = []
+    for new_group_id in variables.moves.get((student_id, activity_id), ()):
+        if not is_move_possible(student_id, activity_id, old_group, variables.groups_dict[new_group_id],
+                                student_groups, variables, constants):
+            continue
+        delta = move_delta(student_id, activity_id, old_group_id, new_group_id, swap_stats, variables, constants)
+        if delta > 0:
+            options.append((delta, new_group_id))
+    options.sort(key=lambda option: -option[0])
+    return options
+
+
+def regret_priority(options: List[Tuple[int, str]], demand: Dict[str, int], variables: Variables):
+    # heap order: contested best group first, then the largest loss if that group fills up
+    best_delta, best_group_id = options[0]
+    regret = best_delta - (options[1][0] if len(options) > 1 else 0)
+    group = variables.groups_dict[best_group_id]
+    contested = demand.get(best_group_id, 0) > group["max"] - group["students_cnt"]
+    return -contested, -regret, -best_delta
+
+
+def make_regret_moves(variables: Variables, constants: Constants, best_score, keys=None):
+    """
+    One sweep over improving single moves in regret order: a move whose best group has fewer free seats
+    than moves wanting it, and whose next option is much worse, is applied first. An entry is
+    re-evaluated when it is popped after its student or one of its groups changed.
+    """
+    student_activity_dict = variables.student_activity_dict
+    options_by_key: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+    for delta, student_id, activity_id, new_group_id in evaluate_single_moves(variables, constants, keys):
+        if delta <= 0:
+            break
+        options_by_key.setdefault((student_id, activity_id), []).append((delta, new_group_id))
+    demand: Dict[str, int] = {}
+    for options in options_by_key.values():
+        demand[options[0][1]] = demand.get(options[0][1], 0) + 1
+
+    heap = [(regret_priority(options, demand, variables), key, 0) for key, options in options_by_key.items()]
+    heapq.heapify(heap)
+    student_changed_at: Dict[str, int] = {}  # moves applied when the student last moved
+    group_changed_at: Dict[str, int] = {}  # moves applied when the group count last changed
+    moved_counter = 0
+
+    while heap:
+        if constants.is_program_end():
+            break
+        _, key, evaluated_at = heapq.heappop(heap)
+        student_id, activity_id = key
+        options = options_by_key[key]
+        old_group_id = student_activity_dict[key]["new_group_id"]
+        if student_changed_at.get(student_id, 0) > evaluated_at \
+                or group_changed_at.get(old_group_id, 0) > evaluated_at \
+                or any(group_changed_at.get(group_id, 0) > evaluated_at for _, group_id in options):
+            demand[options[0][1]] -= 1
+            options = key_options(student_id, activity_id, variables, constants)
+            if options:
+                options_by_key[key] = options
+                demand[options[0][1]] = demand.get(options[0][1], 0) + 1
+                heapq.heappush(heap, (regret_priority(options, demand, variables), key, moved_counter))
+            continue
+
+        delta, new_group_id = options[0]
+        demand[new_group_id] -= 1
+        make_move(student_id, activity_id, new_group_id, old_group_id, variables)
+        variables.global_moves_made.add(key)
+        best_score += delta
+        moved_counter += 1
+        student_changed_at[student_id] = moved_counter
+        group_changed_at[old_group_id] = moved_counter
+        group_changed_at[new_group_id] = moved_counter
+
+    return moved_counter, best_score
@@ -0,0 +1,148 @@
+import heapq
+import math
+import random
+from typing import Tuple, Dict, Set, List
+
+from hmo.model import Variables, MovesDict
+
+MoveKey = Tuple[str, str]
+
+
+class CandidateIndex:
+    """
+    Pending moves ordered by (priority move, free room in the best target group, swap weight).
+
+    make_move/undo_move only mark what they touched, the heap is refreshed lazily
+    when a sample is taken, so temporary moves inside evaluate_move stay cheap.
+    """
+
+    def __init__(self, variables: Variables):
+        self.variables = variables
+        self.keys_by_group: Dict[str, Set[MoveKey]] = {}
+        self.key_list: List[MoveKey] = []
+        self.key_position: Dict[MoveKey, int] = {}
+        self.key_priority: Dict[MoveKey, tuple] = {}
+        self.heap: List[tuple] = []
+        self.dirty_groups: Set[str] = set()
+        self.dirty_keys: Set[MoveKey] = set()
+        self.counter = 0
+        for key, group_ids in variables.moves.items():
+            self._add_key(key)
+            for group_id in group_ids:
+                self.keys_by_group.setdefault(group_id, set()).add(key)
+            self._push(key)
+
+    # Updates (called from make_move/undo_move):
+
+    def touch(self, key: MoveKey, old_group_id: str, new_group_id: str):
+        self.dirty_groups.add(old_group_id)
+        self.dirty_groups.add(new_group_id)
+        self.dirty_keys.add(key)
+
+    def remove_target(self, key: MoveKey, group_id: str, key_removed: bool):
+        self.keys_by_group[group_id].discard(key)
+        if key_removed:
+            self._remove_key(key)
+
+    def add_target(self, key: MoveKey, group_id: str):
+        if key not in self.key_position:
+            self._add_key(key)
+        self.keys_by_group.setdefault(group_id, set()).add(key)
+        self.dirty_keys.add(key)
+
+    # Sampling:
+
+    def sample(self, part_size=None, priority_factor=3) -> MovesDict:
+        moves = self.variables.moves
+        global_moves_made = self.variables.global_moves_made
+        if part_size is None:
+            part_size = 10 + int(math.sqrt(len(moves)))
+        moves_sample: MovesDict = dict()
+
+        i = part_size * priority_factor
+        for key in self.top(i):
+            moves_sample[key] = moves[key]
+            i -= 1
+
+        # add randoms:
+        for _ in range(0, part_size + i):
+            if not self.key_list:
+                break
+            key = random.choice(self.key_list)
+            if key not in global_moves_made:
+                moves_sample[key] = moves[key]
+        return moves_sample
+
+    def top(self, n: int) -> List[MoveKey]:
+        # priority moves and moves with at least enough_room / 2 free seats, best first
+        self.refresh()
+        global_moves_made = self.variables.global_moves_made
+        half_room = self.variables.enough_room / 2
+        result = []
+        popped = []
+        seen = set()
+        while self.heap and len(result) < n:
+            entry = heapq.heappop(self.heap)
+            key = entry[-1]
+            if self.key_priority.get(key) != entry[:-2] or key in seen:
+                continue  # stale entry
+            seen.add(key)
+            popped.append(entry)
+            if key in global_moves_made:
+                continue
+            is_priority, room, _ = entry[:-2]
+            if is_priority == 0 and -room < half_room:
+                break  # everything after this has even less room
+            result.append(key)
+        for entry in popped:
+            heapq.heappush(self.heap, entry)
+        return result
+
+    def refresh(self):
+        keys = self.dirty_keys
+        for group_id in self.dirty_groups:
+            keys.update(self.keys_by_group.get(group_id, ()))
+        for key in keys:
+            if key in self.key_position:
+                self._push(key)
+        self.dirty_groups = set()
+        self.dirty_keys = set()
+        if len(self.heap) > 4 * len(self.key_priority) + 64:
+            self.heap = [entry for entry in self.heap if self.key_priority.get(entry[-1]) == entry[:-2]]
+            heapq.heapify(self.heap)
+
+    # Internals:
+
+    def _priority(self, key: MoveKey) -> tuple:
+        variables = self.variables
+        groups_dict = variables.groups_dict
+        best_room = 0
+        for group_id in variables.moves[key]:
+            group = groups_dict[group_id]
+            room = group["max"] - group["students_cnt"]
+            if room > best_room:
+                best_room = room
+        swap_weight = variables.student_activity_dict[key]["swap_weight"]
+        is_priority = 1 if key in variables.priority_moves else 0
+        return -is_priority, -min(best_room, variables.enough_room), -swap_weight
+
+    def _push(self, key: MoveKey):
+        priority = self._priority(key)
+        if self.key_priority.get(key) == priority:
+            return
+        self.key_priority[key] = priority
+        self.counter += 1
+        heapq.heappush(self.heap, priority + (self.counter, key))
+
+    def _add_key(self, key: MoveKey):
+        self.key_position[key] = len(self.key_list)
+        self.key_list.append(key)
+
+    def _remove_key(self, key: MoveKey):
+        position = self.key_position.pop(key)
+        last = self.key_list.pop()
+        if last != key:
+            self.key_list[position] = last
+            self.key_position[last] = position
+        self.key_priority.pop(key, None)
+        self.dirty_keys.discard(key)
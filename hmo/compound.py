@@ -0,0 +1,137 @@
+from typing import Dict, List, Tuple
+
+from hmo.constraints import is_overlap_free
+from hmo.model import Constants, Variables
+from hmo.moves import make_move
+from hmo.scoring import award_for_swaps, student_swap_stats, group_penalty
+
+
+# Whole-student compound moves:
+
+def student_options(student_id, variables: Variables, constants: Constants) -> List[Tuple[str, List[str]]]:
+    # (activity, [current group] + open requested groups) of every activity the student can leave
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    options = []
+    for activity_id in sorted(constants.activities_by_student[student_id]):
+        key = (student_id, activity_id)
+        if key not in variables.moves:
+            continue
+        current_group_id = student_activity_dict[key]["new_group_id"]
+        current_group = groups_dict[current_group_id]
+        if current_group["students_cnt"] <= current_group["min"]:
+            continue
+        targets = [group_id for group_id in variables.moves[key]
+                   if groups_dict[group_id]["students_cnt"] < groups_dict[group_id]["max"]]
+        if targets:
+            options.append((activity_id, [current_group_id] + targets))
+    return options
+
+
+def best_student_combination(student_id, variables: Variables, constants: Constants):
+    """
+    Best joint choice of groups for all of a student's movable activities, as (delta, {activity: group}).
+    Overlaps are checked among the new groups themselves; the delta of a combination is computed once,
+    at the leaf, from sums collected on the way down.
+    """
+    options = student_options(student_id, variables, constants)
+    if len(options) < 2:
+        return 0, {}
+    combinations_number = 1
+    for _, group_ids in options:
+        combinations_number *= len(group_ids)
+    if combinations_number > constants.compound_limit:
+        return 0, {}
+
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    requests_set = constants.requests_set
+    minmax_penalty = constants.minmax_penalty
+    swaps_number, satisfied_number = student_swap_stats(student_id, variables, constants)
+    requested_number = constants.requested_activities_per_student.get(student_id, 0)
+    base_award = award_for_swaps(swaps_number, constants) \
+        + constants.award_student * (requested_number > 0 and satisfied_number == requested_number)
+
+    moving_activities = {activity_id for activity_id, _ in options}
+    fixed_groups = {student_activity_dict[(student_id, activity_id)]["new_group_id"]
+                    for activity_id in constants.activities_by_student[student_id]
+                    if activity_id not in moving_activities}
+
+    # per (activity, group): (swap change, satisfied change, weight and penalty change)
+    option_terms: List[Dict[str, Tuple[int, int, int]]] = []
+    for activity_id, group_ids in options:
+        student_activity = student_activity_dict[(student_id, activity_id)]
+        original_group_id = student_activity["group_id"]
+        old_group_id = group_ids[0]
+        old_group = groups_dict[old_group_id]
+        old_swapped = old_group_id != original_group_id
+        old_satisfied = old_swapped and (student_id, activity_id, old_group_id) in requests_set
+        leave_penalty = group_penalty(old_group, old_group["students_cnt"] - 1, minmax_penalty) \
+            - group_penalty(old_group, old_group["students_cnt"], minmax_penalty)
+        terms = {old_group_id: (0, 0, 0)}
+        for group_id in group_ids[1:]:
+            new_group = groups_dict[group_id]
+            new_swapped = group_id != original_group_id
+            new_satisfied = new_swapped and (student_id, activity_id, group_id) in requests_set
+            join_penalty = group_penalty(new_group, new_group["students_cnt"] + 1, minmax_penalty) \
+                - group_penalty(new_group, new_group["students_cnt"], minmax_penalty)
+            terms[group_id] = (new_swapped - old_swapped, new_satisfied - old_satisfied,
+                               (new_satisfied - old_satisfied) * student_activity["swap_weight"]
+                               - leave_penalty - join_penalty)
+        option_terms.append(terms)
+
+    best = [0, {}]
+    chosen: List[str] = []
+
+    def search(i, swaps_change, satisfied_change, partial_delta, any_moved):
+        if i == len(options):
+            if not any_moved:
+                return
+            new_satisfied_number = satisfied_number + satisfied_change
+            delta = partial_delta + award_for_swaps(swaps_number + swaps_change, constants) \
+                + constants.award_student * (requested_number > 0 and new_satisfied_number == requested_number) \
+                - base_award
+            if delta > best[0]:
+                best[0] = delta
+                best[1] = {options[j][0]: group_id for j, group_id in enumerate(chosen)
+                           if group_id != options[j][1][0]}
+            return
+        activity_id, group_ids = options[i]
+        for group_id in group_ids:
+            stays = group_id == group_ids[0]
+            # groups already fixed by this combination and the ones of activities that do not move
+            other_groups = fixed_groups.union(chosen)
+            if (not stays or any_moved) \
+                    and not is_overlap_free(student_id, group_id, group_ids[0], other_groups, constants):
+                continue
+            swap_term, satisfied_term, delta_term = option_terms[i][group_id]
+            chosen.append(group_id)
+            search(i + 1, swaps_change + swap_term, satisfied_change + satisfied_term,
+                   partial_delta + delta_term, any_moved or not stays)
+            chosen.pop()
+
+    search(0, 0, 0, 0, False)
+    return best[0], best[1]
+
+
+def make_student_moves(variables: Variables, constants: Constants, best_score):
+    student_activity_dict = variables.student_activity_dict
+    moved_counter = 0
+
+    student_ids = sorted({student_id for student_id, _ in variables.moves
+                          if constants.requested_activities_per_student.get(student_id, 0) > 1})
+    for student_id in student_ids:
+        if constants.is_program_end():
+            break
+        delta, combination = best_student_combination(student_id, variables, constants)
+        if delta <= 0:
+            continue
+        for activity_id, new_group_id in combination.items():
+            old_group_id = student_activity_dict[(student_id, activity_id)]["new_group_id"]
+            make_move(student_id, activity_id, new_group_id, old_group_id, variables)
+            variables.global_moves_made.add((student_id, activity_id))
+        best_score += delta
+        moved_counter += 1
+
+    print("Student moves made ", moved_counter)
+    return moved_counter > 0, best_score
@@ -0,0 +1,71 @@
+from hmo.model import Constants, Variables
+
+
+# call before make move
+def is_move_possible(student_id, activity_id, old_group, new_group, student_groups: set,
+                     variables: Variables, constants: Constants):
+    overlaps_matrix = constants.overlaps_matrix
+    allowed_overlaps_by_student = constants.allowed_overlaps_by_student
+    if old_group["students_cnt"] <= old_group["min"] or new_group["students_cnt"] >= new_group["max"]:
+        return False
+    for group_id in student_groups:
+        if group_id == old_group["group_id"] or group_id not in overlaps_matrix:
+            continue
+        if student_id in allowed_overlaps_by_student \
+                and (group_id, new_group["group_id"]) in allowed_overlaps_by_student[student_id]:
+            continue
+        if new_group["group_id"] in overlaps_matrix[group_id]:
+            return False
+    return True
+
+
+def is_overlap_free(student_id, group_id, ignored_group_id, student_groups: set, constants: Constants):
+    overlaps_matrix = constants.overlaps_matrix
+    group_overlaps = overlaps_matrix.get(group_id)
+    if group_overlaps is None:
+        return True
+    allowed_overlaps = constants.allowed_overlaps_by_student.get(student_id, ())
+    for other_group_id in student_groups:
+        if other_group_id == ignored_group_id or other_group_id == group_id:
+            continue
+        if other_group_id in group_overlaps and (other_group_id, group_id) not in allowed_overlaps:
+            return False
+    return True
+
+
+def is_move_possible_for_swap(student_id, activity_id, old_group, new_group, student_groups: set,
+                              variables: Variables, constants: Constants):
+    new_group["max"] += 1
+    new_group["min"] -= 1
+    result = is_move_possible(student_id, activity_id, old_group, new_group, student_groups, variables, constants)
+    new_group["max"] -= 1
+    new_group["min"] += 1
+    return result
+
+
+# call after make move
+def is_state_possible(variables: Variables, constants: Constants, verbose=False):
+    groups_dict = variables.groups_dict
+    student_groups_dict = variables.student_groups_dict
+    overlaps_matrix = constants.overlaps_matrix
+    allowed_overlaps_by_student = constants.allowed_overlaps_by_student
+    if any(group["students_cnt"] < group["min"] or group["students_cnt"] > group["max"]
+           for group in groups_dict.values()):
+        if verbose:
+            print("One group over or under capacity")
+        return False
+    for student_id, student_groups in student_groups_dict.items():
+        checked = set()
+        for group1_id in student_groups:
+            checked.add(group1_id)
+            for group2_id in student_groups:
+                if group2_id in checked or group2_id not in overlaps_matrix:
+                    continue
+                if student_id in allowed_overlaps_by_student \
+                        and (group1_id, group2_id) in allowed_overlaps_by_student[student_id]:
+                    continue
+                if group1_id in overlaps_matrix[group2_id]:
+                    if verbose:
+                        print("One group overlaps with other: ", (group1_id, group2_id), " for student: ", student_id)
+                    return False
+    return True
@@ -0,0 +1,98 @@
+import csv
+import os
+import sys
+import threading
+from time import time
+
+from hmo.constraints import is_state_possible
+from hmo.loader import print_result
+from hmo.model import Constants, Variables
+from hmo.scoring import score_total
+from hmo.trail import Snapshot
+
+
+# Output reserve:
+
+def measure_output_reserve(variables: Variables, constants: Constants, filename='out.csv'):
+    # time everything main() does after the search: writing the file, the final scores and the
+    # feasibility check; writing the input assignment also leaves a valid file from the start
+    start = time()
+    print_result(variables, filename)
+    write_time = time() - start
+    start = time()
+    score_total(variables, constants)
+    is_state_possible(variables, constants)
+    check_time = time() - start
+    constants.output_reserve = 2 * (write_time + check_time) + 0.2
+    print("output reserve: ", constants.output_reserve, " seconds.")
+    return write_time
+
+
+# Deadline timer:
+
+def start_deadline_timer(constants: Constants):
+    # raise program_ended at the deadline without the output part of the watchdog (used in workers)
+    def end():
+        constants.program_ended = True
+    timer = threading.Timer(max(0.0, constants.get_deadline() - time()), end)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+# Watchdog:
+
+class Watchdog:
+    """
+    Raises constants.program_ended at the deadline, so the search loops do not need the clock.
+    Writes the last checkpointed assignment and ends the process if the search has not
+    returned by the hard deadline (timeout minus the measured write time).
+    """
+
+    def __init__(self, variables: Variables, constants: Constants, write_time: float, filename='out.csv'):
+        self.variables = variables
+        self.constants = constants
+        self.filename = filename
+        self.hard_deadline = constants.program_start + constants.timeout - 1.5 * write_time - 0.1
+        self.snapshot = Snapshot(variables)
+        self.done = threading.Event()
+        self.lock = threading.Lock()  # held by the checkpoint write, and by stop() so it cannot overlap one
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        # called before the final write: after it the watchdog never writes; if its write has already
+        # started, this waits for it and the process ends there
+        with self.lock:
+            self.done.set()
+
+    def checkpoint(self, snapshot: Snapshot):
+        # called by solve between phases with the best assignment found so far
+        self.snapshot = snapshot
+
+    def run(self):
+        if self.done.wait(max(0.0, self.constants.get_deadline() - time())):
+            return
+        self.constants.program_ended = True
+        if self.done.wait(max(0.0, self.hard_deadline - time())):
+            return
+        self.lock.acquire()
+        if self.done.is_set():
+            self.lock.release()
+            return  # the final write has started
+        assignment = self.snapshot.assignment(self.variables)
+        with open(self.filename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["student_id", "activity_id", "swap_weight", "group_id", "new_group_id"])
+            writer.writerows([
+                student["student_id"],
+                student["activity_id"],
+                student["swap_weight"],
+                student["group_id"],
+                assignment[key]
+            ] for key, student in self.variables.student_activity_dict.items())
+        print("watchdog: search did not return in time, wrote last checkpoint")
+        sys.stdout.flush()
+        os._exit(0)
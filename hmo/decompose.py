@@ -0,0 +1,171 @@
+import multiprocessing
+from collections import deque
+from time import time
+from typing import Dict, List, Set, Tuple
+
+from hmo.deadline import start_deadline_timer
+from hmo.model import Constants, Variables
+from hmo.search import solve
+
+
+# Types and classes:
+
+class Component:
+    def __init__(self):
+        self.groups: Set[str] = set()
+        self.students: Set[str] = set()
+        self.size = 0  # pending (student, activity) moves
+
+
+# Components:
+
+def find_components(variables: Variables) -> List[Component]:
+    # groups are connected when one student can move between them, or when one student
+    # has pending moves in both (overlaps and per-student awards tie the student's activities)
+    parent: Dict[str, str] = {}
+
+    def find(group_id):
+        root = group_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[group_id] != root:
+            parent[group_id], group_id = root, parent[group_id]
+        return root
+
+    def union(group1_id, group2_id):
+        root1, root2 = find(group1_id), find(group2_id)
+        if root1 != root2:
+            parent[root2] = root1
+
+    first_group_by_student: Dict[str, str] = {}
+    for (student_id, activity_id), group_ids in variables.moves.items():
+        current_group_id = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+        parent.setdefault(current_group_id, current_group_id)
+        for group_id in group_ids:
+            parent.setdefault(group_id, group_id)
+            union(current_group_id, group_id)
+        if student_id in first_group_by_student:
+            union(first_group_by_student[student_id], current_group_id)
+        else:
+            first_group_by_student[student_id] = current_group_id
+
+    components: Dict[str, Component] = {}
+    for group_id in parent:
+        components.setdefault(find(group_id), Component()).groups.add(group_id)
+    for (student_id, activity_id) in variables.moves:
+        component = components[find(first_group_by_student[student_id])]
+        component.students.add(student_id)
+        component.size += 1
+    return sorted(components.values(), key=lambda component: -component.size)
+
+
+def extract_component(students: Set[str], groups: Set[str], variables: Variables, constants: Constants):
+    # a self-contained sub-instance; scores of everything outside it are constant
+    sub_constants = Constants()
+    sub_constants.award_activity = constants.award_activity
+    sub_constants.award_student = constants.award_student
+    sub_constants.minmax_penalty = constants.minmax_penalty
+    sub_constants.lns = constants.lns
+    sub_constants.overlaps_matrix = constants.overlaps_matrix
+    sub_constants.requests_set = {request for request in constants.requests_set if request[0] in students}
+    sub_constants.request_groups = {key: value for key, value in constants.request_groups.items()
+                                    if key[0] in students}
+    sub_constants.requested_activities_per_student = {
+        student_id: value for student_id, value in constants.requested_activities_per_student.items()
+        if student_id in students}
+    sub_constants.allowed_overlaps_by_student = {
+        student_id: value for student_id, value in constants.allowed_overlaps_by_student.items()
+        if student_id in students}
+    sub_constants.activities_by_student = {student_id: constants.activities_by_student[student_id]
+                                           for student_id in students}
+    for student_id in students:
+        for activity_id in constants.activities_by_student[student_id]:
+            sub_constants.students_by_activity.setdefault(activity_id, set()).add(student_id)
+
+    sub_variables = Variables()
+    sub_variables.enough_room = variables.enough_room
+    for student_id in students:
+        for activity_id in constants.activities_by_student[student_id]:
+            key = (student_id, activity_id)
+            sub_variables.student_activity_dict[key] = dict(variables.student_activity_dict[key])
+            if key in variables.moves:
+                sub_variables.moves[key] = deque(variables.moves[key])
+            if key in variables.priority_moves:
+                sub_variables.priority_moves.add(key)
+            if key in variables.global_moves_made:
+                sub_variables.global_moves_made.add(key)
+        sub_variables.student_groups_dict[student_id] = set(variables.student_groups_dict[student_id])
+        if student_id in variables.requests_by_student:
+            sub_variables.requests_by_student[student_id] = dict(variables.requests_by_student[student_id])
+    sub_variables.groups_dict = {group_id: dict(variables.groups_dict[group_id]) for group_id in groups}
+    return sub_variables, sub_constants
+
+
+def pack_components(components: List[Component], bins_number: int) -> List[List[Component]]:
+    # largest first onto the least loaded bin
+    bins: List[List[Component]] = [[] for _ in range(min(bins_number, len(components)))]
+    loads = [0] * len(bins)
+    for component in components:
+        i = loads.index(min(loads))
+        bins[i].append(component)
+        loads[i] += component.size
+    return bins
+
+
+# Solve:
+
+def solve_bin(task):
+    sub_instances, deadline = task
+    total_size = sum(size for size, _, _ in sub_instances)
+    changes: List[Tuple[Tuple[str, str], str]] = []
+    used_size = 0
+    for size, sub_variables, sub_constants in sub_instances:
+        # share of what is left, so time not used by a component goes to the next ones
+        time_left = deadline - time()
+        share = time_left * size / (total_size - used_size)
+        used_size += size
+        sub_constants.program_start = time()
+        sub_constants.timeout = share + sub_constants.output_reserve
+        start_groups = {key: student["new_group_id"] for key, student in sub_variables.student_activity_dict.items()}
+        timer = start_deadline_timer(sub_constants)
+        solve(sub_variables, sub_constants)
+        timer.cancel()
+        changes.extend((key, student["new_group_id"])
+                       for key, student in sub_variables.student_activity_dict.items()
+                       if student["new_group_id"] != start_groups[key])
+    return changes
+
+
+def apply_changes(changes, variables: Variables):
+    for (student_id, activity_id), new_group_id in changes:
+        student = variables.student_activity_dict[(student_id, activity_id)]
+        old_group_id = student["new_group_id"]
+        variables.groups_dict[old_group_id]["students_cnt"] -= 1
+        variables.groups_dict[new_group_id]["students_cnt"] += 1
+        variables.student_groups_dict[student_id].remove(old_group_id)
+        variables.student_groups_dict[student_id].add(new_group_id)
+        student["new_group_id"] = new_group_id
+
+
+def solve_components(variables: Variables, constants: Constants, workers: int):
+    components = find_components(variables)
+    print("Components ", len(components), ", largest ", components[0].size if components else 0)
+    if not components:
+        return
+
+    bins = pack_components(components, workers)
+    sub_instances = [[(component.size,) + extract_component(component.students, component.groups,
+                                                            variables, constants)
+                      for component in components_bin]
+                     for components_bin in bins]
+    # workers share the clock, so the deadline also covers starting the pool
+    tasks = [(bin_instances, constants.get_deadline()) for bin_instances in sub_instances]
+
+    if len(tasks) == 1:
+        results = [solve_bin(tasks[0])]
+    else:
+        with multiprocessing.Pool(len(tasks)) as pool:
+            results = pool.map(solve_bin, tasks)
+
+    for changes in results:
+        apply_changes(changes, variables)
@@ -0,0 +1,104 @@
+import random
+from typing import List
+
+from hmo.constraints import is_move_possible
+from hmo.model import Constants, Variables
+from hmo.moves import assign_group
+from hmo.scoring import move_delta, student_swap_stats
+from hmo.trail import Snapshot
+
+
+# Elite pool:
+
+def snapshot_distance(snapshot1: Snapshot, snapshot2: Snapshot):
+    # number of (student, activity) entries assigned differently
+    changed1 = snapshot1.changed
+    changed2 = snapshot2.changed
+    return sum(1 for key in changed1.keys() | changed2.keys() if changed1.get(key) != changed2.get(key))
+
+
+class ElitePool:
+    """
+    At most size high-scoring assignments, each at least min_distance entries away from the others;
+    a new assignment too close to a member replaces it only if it scores better.
+    """
+
+    def __init__(self, size: int, min_distance: int):
+        self.size = size
+        self.min_distance = min_distance
+        self.members: List[Snapshot] = []
+
+    def add(self, snapshot: Snapshot):
+        for i, member in enumerate(self.members):
+            if snapshot_distance(snapshot, member) < self.min_distance:
+                if snapshot.score > member.score:
+                    self.members[i] = snapshot
+                    return True
+                return False
+        if len(self.members) < self.size:
+            self.members.append(snapshot)
+            return True
+        worst = min(range(len(self.members)), key=lambda i: self.members[i].score)
+        if snapshot.score <= self.members[worst].score:
+            return False
+        self.members[worst] = snapshot
+        return True
+
+    def pick_guide(self, snapshot: Snapshot):
+        # a random member far enough from snapshot to relink towards
+        guides = [member for member in self.members if snapshot_distance(snapshot, member) >= self.min_distance]
+        return random.choice(guides) if guides else None
+
+
+# Path relinking:
+
+def path_relink(guide: Snapshot, score, variables: Variables, constants: Constants):
+    """
+    Walk from the current assignment towards guide, taking the feasible differing entry with the best
+    score delta at each step, and stop at the best intermediate assignment (neither end of the path).
+    Returns its score, or None (state unchanged) if the path has no intermediate.
+    """
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    pending = {key: group_id for key, group_id in guide.assignment(variables).items()
+               if student_activity_dict[key]["new_group_id"] != group_id}
+    steps = []  # (key, group left)
+    best_steps_number = 0
+    best_score = None
+    while len(pending) > 1 and not constants.is_program_end():
+        best_step = None
+        for (student_id, activity_id), group_id in pending.items():
+            old_group_id = student_activity_dict[(student_id, activity_id)]["new_group_id"]
+            if not is_move_possible(student_id, activity_id, groups_dict[old_group_id], groups_dict[group_id],
+                                    variables.student_groups_dict[student_id], variables, constants):
+                continue
+            delta = move_delta(student_id, activity_id, old_group_id, group_id,
+                               student_swap_stats(student_id, variables, constants), variables, constants)
+            if best_step is None or delta > best_step[0]:
+                best_step = (delta, student_id, activity_id, group_id)
+        if best_step is None:
+            break
+        delta, student_id, activity_id, group_id = best_step
+        key = (student_id, activity_id)
+        steps.append((key, student_activity_dict[key]["new_group_id"]))
+        assign_group(student_id, activity_id, group_id, variables, constants)
+        pending.pop(key)
+        score += delta
+        if best_score is None or score > best_score:
+            best_score = score
+            best_steps_number = len(steps)
+
+    # back to the best intermediate
+    for (student_id, activity_id), group_id in reversed(steps[best_steps_number:]):
+        assign_group(student_id, activity_id, group_id, variables, constants)
+    for key, _ in steps[:best_steps_number]:
+        if student_activity_dict[key]["new_group_id"] != student_activity_dict[key]["group_id"]:
+            variables.global_moves_made.add(key)
+        else:
+            variables.global_moves_made.discard(key)
+    # assign_group does not keep the indexes
+    variables.candidates = None
+    variables.group_index = None
+    if best_score is not None:
+        print("Relinked ", best_steps_number, " entries towards an elite assignment, score ", best_score)
+    return best_score
@@ -0,0 +1,61 @@
+from collections import deque
+from typing import List
+
+
+class MinCostFlow:
+    """Successive shortest paths (SPFA), small graphs only: negative edge costs are allowed."""
+
+    def __init__(self, nodes_number: int):
+        self.nodes_number = nodes_number
+        # edge: [to, capacity, cost, reverse edge index]
+        self.graph: List[List[list]] = [[] for _ in range(nodes_number)]
+
+    def add_edge(self, from_node: int, to_node: int, capacity: int, cost: int):
+        forward = [to_node, capacity, cost, len(self.graph[to_node])]
+        backward = [from_node, 0, -cost, len(self.graph[from_node])]
+        self.graph[from_node].append(forward)
+        self.graph[to_node].append(backward)
+        return forward
+
+    def flow(self, source: int, sink: int, max_flow: int):
+        graph = self.graph
+        total_flow = 0
+        total_cost = 0
+        while total_flow < max_flow:
+            distance = [None] * self.nodes_number
+            previous = [None] * self.nodes_number
+            in_queue = [False] * self.nodes_number
+            distance[source] = 0
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                in_queue[node] = False
+                for index, (to_node, capacity, cost, _) in enumerate(graph[node]):
+                    if capacity <= 0:
+                        continue
+                    new_distance = distance[node] + cost
+                    if distance[to_node] is None or new_distance < distance[to_node]:
+                        distance[to_node] = new_distance
+                        previous[to_node] = (node, index)
+                        if not in_queue[to_node]:
+                            in_queue[to_node] = True
+                            queue.append(to_node)
+            if distance[sink] is None:
+                break
+
+            pushed = max_flow - total_flow
+            node = sink
+            while node != source:
+                from_node, index = previous[node]
+                pushed = min(pushed, graph[from_node][index][1])
+                node = from_node
+            node = sink
+            while node != source:
+                from_node, index = previous[node]
+                edge = graph[from_node][index]
+                edge[1] -= pushed
+                graph[node][edge[3]][1] += pushed
+                node = from_node
+            total_flow += pushed
+            total_cost += pushed * distance[sink]
+        return total_flow, total_cost
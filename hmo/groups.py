@@ -0,0 +1,93 @@
+from typing import Tuple, Dict, Set
+
+from hmo.model import Constants, Variables
+
+MoveKey = Tuple[str, str]
+
+
+class GroupIndex:
+    """
+    Closed groups (full: nobody can join, at min: nobody can leave) and the pending moves
+    waiting on them.
+
+    make_move/undo_move report every count change; pop_affected_keys() returns only the
+    moves whose feasibility or score could have changed since the last call, so a blocked move
+    comes back as soon as a seat frees up in its target or its current group goes above min.
+    """
+
+    def __init__(self, variables: Variables, constants: Constants):
+        self.variables = variables
+        self.activities_by_student = constants.activities_by_student
+        self.full_groups: Set[str] = set()
+        self.min_groups: Set[str] = set()
+        self.keys_by_target: Dict[str, Set[MoveKey]] = {}
+        self.keys_by_current: Dict[str, Set[MoveKey]] = {}
+        self.changed_groups: Set[str] = set()
+        self.changed_students: Set[str] = set()
+        self.everything_changed = True
+        for group_id in variables.groups_dict:
+            self._update_group(group_id)
+        for key, group_ids in variables.moves.items():
+            self._add_current(key, variables.student_activity_dict[key]["new_group_id"])
+            for group_id in group_ids:
+                self.keys_by_target.setdefault(group_id, set()).add(key)
+
+    # Queries:
+
+    def is_blocked(self, key: MoveKey):
+        # current group at min, or every target full
+        variables = self.variables
+        if variables.student_activity_dict[key]["new_group_id"] in self.min_groups:
+            return True
+        full_groups = self.full_groups
+        return all(group_id in full_groups for group_id in variables.moves[key])
+
+    def pop_affected_keys(self):
+        moves = self.variables.moves
+        if self.everything_changed:
+            keys = set(moves)
+        else:
+            keys = set()
+            for group_id in self.changed_groups:
+                keys.update(self.keys_by_target.get(group_id, ()))
+                keys.update(self.keys_by_current.get(group_id, ()))
+            activities_by_student = self.activities_by_student
+            for student_id in self.changed_students:
+                keys.update((student_id, activity_id) for activity_id in activities_by_student[student_id])
+        self.changed_groups = set()
+        self.changed_students = set()
+        self.everything_changed = False
+        return {key for key in keys if key in moves and not self.is_blocked(key)}
+
+    # Updates (called from make_move/undo_move):
+
+    def moved(self, key: MoveKey, from_group_id: str, to_group_id: str):
+        self._update_group(from_group_id)
+        self._update_group(to_group_id)
+        self.changed_groups.add(from_group_id)
+        self.changed_groups.add(to_group_id)
+        self.changed_students.add(key[0])
+        self.keys_by_current[from_group_id].discard(key)
+        self._add_current(key, to_group_id)
+
+    def remove_target(self, key: MoveKey, group_id: str):
+        self.keys_by_target[group_id].discard(key)
+
+    def add_target(self, key: MoveKey, group_id: str):
+        self.keys_by_target.setdefault(group_id, set()).add(key)
+
+    # Internals:
+
+    def _add_current(self, key: MoveKey, group_id: str):
+        self.keys_by_current.setdefault(group_id, set()).add(key)
+
+    def _update_group(self, group_id: str):
+        group = self.variables.groups_dict[group_id]
+        if group["students_cnt"] >= group["max"]:
+            self.full_groups.add(group_id)
+        else:
+            self.full_groups.discard(group_id)
+        if group["students_cnt"] <= group["min"]:
+            self.min_groups.add(group_id)
+        else:
+            self.min_groups.discard(group_id)
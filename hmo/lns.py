@@ -0,0 +1,160 @@
+from typing import Dict, List
+
+from hmo.constraints import is_overlap_free
+from hmo.flow import MinCostFlow
+from hmo.model import Constants, Variables
+from hmo.moves import make_move, undo_move
+from hmo.scoring import score_total, award_for_swaps
+
+
+# Activity-local reoptimisation (large neighbourhood search):
+
+def group_seat_costs(group: dict, base_cnt: int, minmax_penalty: int, big: int):
+    # convex cost of filling seats base_cnt + 1 .. max, merged into runs of equal marginal cost
+    segments = []
+    for cnt in range(base_cnt + 1, group["max"] + 1):
+        cost = 0
+        if cnt <= group["min"]:
+            cost -= big  # seats below min have to be filled first
+        if cnt <= group["min_preferred"]:
+            cost -= minmax_penalty
+        if cnt > group["max_preferred"]:
+            cost += minmax_penalty
+        if segments and segments[-1][1] == cost:
+            segments[-1][0] += 1
+        else:
+            segments.append([1, cost])
+    return segments
+
+
+def student_option_gains(student_id, activity_id, options: List[str],
+                         variables: Variables, constants: Constants) -> Dict[str, int]:
+    # score contribution of each option with the student's other activities fixed
+    student_activity_dict = variables.student_activity_dict
+    requests_set = constants.requests_set
+    other_swaps = 0
+    other_satisfied = 0
+    for other_activity_id in constants.activities_by_student[student_id]:
+        if other_activity_id == activity_id:
+            continue
+        other = student_activity_dict[(student_id, other_activity_id)]
+        if other["new_group_id"] != other["group_id"]:
+            other_swaps += 1
+            if (student_id, other_activity_id, other["new_group_id"]) in requests_set:
+                other_satisfied += 1
+    requested_number = constants.requested_activities_per_student.get(student_id, 0)
+
+    student_activity = student_activity_dict[(student_id, activity_id)]
+    gains = {}
+    for group_id in options:
+        gain = 0
+        swapped = group_id != student_activity["group_id"]
+        satisfied = swapped and (student_id, activity_id, group_id) in requests_set
+        if satisfied:
+            gain += student_activity["swap_weight"]
+        gain += award_for_swaps(other_swaps + (1 if swapped else 0), constants)
+        if requested_number > 0 and other_satisfied + (1 if satisfied else 0) == requested_number:
+            gain += constants.award_student
+        gains[group_id] = gain
+    return gains
+
+
+def reoptimise_activity(activity_id, variables: Variables, constants: Constants):
+    """Exact best assignment of the students of one activity, other activities fixed."""
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+
+    # free students: those with somewhere to go, everyone else stays where they are
+    free_options: Dict[str, List[str]] = {}
+    for student_id in constants.students_by_activity[activity_id]:
+        key = (student_id, activity_id)
+        if key not in variables.moves:
+            continue
+        current_group_id = student_activity_dict[key]["new_group_id"]
+        student_groups = variables.student_groups_dict[student_id]
+        options = [current_group_id] + [group_id for group_id in variables.moves[key]
+                                        if is_overlap_free(student_id, group_id, current_group_id,
+                                                           student_groups, constants)]
+        if len(options) > 1:
+            free_options[student_id] = options
+    if not free_options:
+        return {}
+
+    base_cnt: Dict[str, int] = {}
+    for student_id, options in free_options.items():
+        for group_id in options:
+            base_cnt[group_id] = groups_dict[group_id]["students_cnt"]
+    for student_id, options in free_options.items():
+        base_cnt[options[0]] -= 1
+
+    gains = {student_id: student_option_gains(student_id, activity_id, options, variables, constants)
+             for student_id, options in free_options.items()}
+    big = 1 + sum(max(option_gains.values()) - min(option_gains.values()) for option_gains in gains.values()) \
+        + 2 * constants.minmax_penalty * len(free_options)
+    top_gain = max(max(option_gains.values()) for option_gains in gains.values())
+
+    students = list(free_options)
+    groups = list(base_cnt)
+    group_node = {group_id: 1 + len(students) + i for i, group_id in enumerate(groups)}
+    source, sink = 0, 1 + len(students) + len(groups)
+    flow = MinCostFlow(sink + 1)
+    student_edges = {}
+    for i, student_id in enumerate(students):
+        flow.add_edge(source, 1 + i, 1, 0)
+        student_edges[student_id] = [(group_id, flow.add_edge(1 + i, group_node[group_id], 1,
+                                                               top_gain - gains[student_id][group_id]))
+                                     for group_id in free_options[student_id]]
+    for group_id in groups:
+        for capacity, cost in group_seat_costs(groups_dict[group_id], base_cnt[group_id],
+                                               constants.minmax_penalty, big):
+            flow.add_edge(group_node[group_id], sink, capacity, cost)
+
+    flow_value, _ = flow.flow(source, sink, len(students))
+    if flow_value < len(students):
+        return {}  # should not happen, the current assignment is a feasible flow
+
+    assignment = {}
+    for student_id, edges in student_edges.items():
+        for group_id, edge in edges:
+            if edge[1] == 0 and group_id != free_options[student_id][0]:
+                assignment[student_id] = group_id
+    return assignment
+
+
+def make_lns_moves(variables: Variables, constants: Constants, best_score):
+    any_improved = False
+    improved_counter = 0
+
+    activity_ids = sorted({activity_id for _, activity_id in variables.moves})
+    for activity_id in activity_ids:
+        if constants.is_program_end():
+            break
+
+        assignment = reoptimise_activity(activity_id, variables, constants)
+        if not assignment:
+            continue
+
+        mark = variables.trail.mark() if variables.trail is not None else None
+        moves_made = []
+        for student_id, new_group_id in assignment.items():
+            old_group_id = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+            make_move(student_id, activity_id, new_group_id, old_group_id, variables)
+            moves_made.append((student_id, new_group_id, old_group_id))
+
+        score = score_total(variables, constants)
+        if score > best_score:
+            any_improved = True
+            best_score = score
+            improved_counter += 1
+            for student_id, _, _ in moves_made:
+                variables.global_moves_made.add((student_id, activity_id))
+        elif mark is not None:
+            variables.trail.rollback(mark, variables)
+        else:
+            for student_id, new_group_id, old_group_id in reversed(moves_made):
+                undo_move(student_id, activity_id, new_group_id, old_group_id, variables)
+        if mark is not None:
+            variables.trail.release(mark)
+
+    print("Activities reoptimised ", improved_counter)
+    return any_improved, best_score
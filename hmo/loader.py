@@ -0,0 +1,278 @@
+import bz2
+import csv
+import gzip
+import lzma
+import math
+import os
+from collections import deque
+from typing import Iterator, List, NamedTuple
+
+from hmo.model import Constants, Variables
+
+
+# Types and classes:
+
+class LimitColumns(NamedTuple):
+    group_id: List[str]
+    students_cnt: List[int]
+    min: List[int]
+    min_preferred: List[int]
+    max: List[int]
+    max_preferred: List[int]
+
+
+class StudentColumns(NamedTuple):
+    student_id: List[str]
+    activity_id: List[str]
+    swap_weight: List[int]
+    group_id: List[str]
+    new_group_id: List[str]
+
+
+class RequestColumns(NamedTuple):
+    student_id: List[str]
+    activity_id: List[str]
+    req_group_id: List[str]
+
+
+class OverlapColumns(NamedTuple):
+    group1_id: List[str]
+    group2_id: List[str]
+
+
+# Read:
+
+COMPRESSED_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def instance_files(data_dir, instance):
+    # (students, requests, overlaps, limits) files of data_dir/instance, plain or compressed
+    directory = os.path.join(data_dir, instance)
+    files = []
+    for name in ("student.csv", "requests.csv", "overlaps.csv", "limits.csv"):
+        filename = os.path.join(directory, name)
+        for suffix in COMPRESSED_OPENERS:
+            if not os.path.exists(filename) and os.path.exists(filename + suffix):
+                filename += suffix
+        files.append(filename)
+    return tuple(files)
+
+
+def open_text(filename):
+    # text file, decompressed while reading if it ends in .gz, .bz2 or .xz
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(filename)[1], open)
+    return opener(filename, 'rt', encoding='utf-8', newline='')
+
+
+def read_columns(filename, width: int) -> List[List[str]]:
+    # whole file in one read, split line by line into one flat list of fields and sliced into
+    # columns, so no per-row objects are kept
+    with open_text(filename) as file:
+        text = file.read()
+    if '\r' in text:
+        text = text.replace('\r', '')
+    fields = []
+    for line_number, line in enumerate(text.split('\n')[1:], 2):  # skip header
+        if not line:
+            continue
+        row = line.split(',')
+        if len(row) != width:
+            raise ValueError("%s:%d: expected %d fields" % (filename, line_number, width))
+        fields.extend(row)
+    return [fields[i::width] for i in range(width)]
+
+
+def iterate_rows(filename, width: int) -> Iterator[List[str]]:
+    # rows one at a time without the header, for files too big to read whole
+    with open_text(filename) as file:
+        next(file, None)
+        for line_number, line in enumerate(file, 2):
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            fields = line.split(',')
+            if len(fields) != width:
+                raise ValueError("%s:%d: expected %d fields" % (filename, line_number, width))
+            yield fields
+
+
+def read_limits(filename) -> LimitColumns:
+    group_id, students_cnt, min_, min_preferred, max_, max_preferred = read_columns(filename, 6)
+    return LimitColumns(group_id,
+                        list(map(int, students_cnt)),
+                        list(map(int, min_)),
+                        list(map(int, min_preferred)),
+                        list(map(int, max_)),
+                        list(map(int, max_preferred)))
+
+
+def read_students(filename) -> StudentColumns:
+    student_id, activity_id, swap_weight, group_id, new_group_id = read_columns(filename, 5)
+    # having 0 is the same as remaining in the same group
+    new_group_id = [group if new_group == "0" else new_group
+                    for group, new_group in zip(group_id, new_group_id)]
+    return StudentColumns(student_id, activity_id, list(map(int, swap_weight)), group_id, new_group_id)
+
+
+def read_requests(filename) -> RequestColumns:
+    return RequestColumns(*read_columns(filename, 3))
+
+
+def read_overlaps(filename) -> OverlapColumns:
+    return OverlapColumns(*read_columns(filename, 2))
+
+
+# Load:
+
+def load_instance(students_file, requests_file, overlaps_file, limits_file,
+                  variables: Variables, constants: Constants):
+    build_instance(read_limits(limits_file), read_students(students_file), read_requests(requests_file),
+                   read_overlaps(overlaps_file), variables, constants)
+
+
+def build_instance(limits, students, requests, overlaps, variables: Variables, constants: Constants):
+    # limits, students, requests and overlaps are the columns of the four files
+    student_activity_dict = variables.student_activity_dict
+    student_groups_dict = variables.student_groups_dict
+    group_student_dict = variables.group_student_dict
+    requests_set = constants.requests_set
+    priority_moves = variables.priority_moves
+    moves = variables.moves
+    request_groups = constants.request_groups
+    requested_activities_per_student = constants.requested_activities_per_student
+    groups_by_activity = constants.groups_by_activity
+    students_by_activity = constants.students_by_activity
+    activities_by_student = constants.activities_by_student
+    requests_by_student = variables.requests_by_student
+    overlaps_matrix = constants.overlaps_matrix
+    allowed_overlaps_by_student = constants.allowed_overlaps_by_student
+    groups_dict = variables.groups_dict
+
+    # Limits file:
+
+    total_room = 0
+    for group_id, students_cnt, min_, min_preferred, max_, max_preferred in zip(*limits):
+        groups_dict[group_id] = {
+            "group_id": group_id,
+            "students_cnt": students_cnt,
+            "min": min_,
+            "min_preferred": min_preferred,
+            "max": max_,
+            "max_preferred": max_preferred
+        }
+        total_room += max_ - students_cnt
+
+    variables.enough_room = int(constants.enough_room_base
+                                + constants.enough_room_factor * math.sqrt(total_room / len(groups_dict)))
+
+    # Students file:
+
+    for student_id, activity_id, swap_weight, group_id, new_group_id in zip(*students):
+
+        # Constants calculation:
+
+        student_activity_dict[(student_id, activity_id)] = {
+            "student_id": student_id,
+            "activity_id": activity_id,
+            "swap_weight": swap_weight,
+            "group_id": group_id,
+            "new_group_id": new_group_id
+        }
+
+        if activity_id not in groups_by_activity:
+            groups_by_activity[activity_id] = set()
+            students_by_activity[activity_id] = set()
+        groups_by_activity[activity_id].add(group_id)
+        groups_by_activity[activity_id].add(new_group_id)
+        students_by_activity[activity_id].add(student_id)
+        if student_id not in activities_by_student:
+            activities_by_student[student_id] = set()
+        activities_by_student[student_id].add(activity_id)
+
+        # Variables calculation:
+
+        if student_id not in student_groups_dict:
+            student_groups_dict[student_id] = set()
+        student_groups_dict[student_id].add(new_group_id)
+        if new_group_id not in group_student_dict:
+            group_student_dict[new_group_id] = set()
+        group_student_dict[new_group_id].add(student_id)
+
+        if new_group_id != group_id:
+            groups_dict[new_group_id]["students_cnt"] += 1
+            groups_dict[group_id]["students_cnt"] -= 1
+            variables.global_moves_made.add((student_id, activity_id))
+
+    # Requests file:
+
+    for student_id, activity_id, req_group_id in zip(*requests):
+        if (student_id, activity_id) not in student_activity_dict:
+            continue  # zanemari zahtjeve kojih nema u student.csv
+        if activity_id not in groups_by_activity:
+            continue  # kako prebaciti studenta u aktivnost koja ne postoji
+        if student_id not in student_groups_dict:
+            continue  # kako prebaciti studenta koji ne postoji
+
+        # Constants calculation:
+
+        requests_set.add((student_id, activity_id, req_group_id))
+
+        if (student_id, activity_id) not in request_groups:
+            request_groups[(student_id, activity_id)] = set()
+            if student_id not in requested_activities_per_student:
+                requested_activities_per_student[student_id] = 0
+            requested_activities_per_student[student_id] += 1
+        request_groups[(student_id, activity_id)].add(req_group_id)
+
+        groups_by_activity[activity_id].add(req_group_id)
+
+        # Variables calculation:
+
+        current_group_id = student_activity_dict[(student_id, activity_id)]["new_group_id"]
+        if current_group_id == req_group_id:
+            continue  # request already approved
+
+        if student_id not in requests_by_student:
+            requests_by_student[student_id] = {}
+        requests_by_student[student_id][(current_group_id, req_group_id)] = activity_id
+
+        if (student_id, activity_id) not in moves:
+            if groups_dict[req_group_id]["students_cnt"] + variables.enough_room \
+                    <= groups_dict[req_group_id]["max"]:
+                priority_moves.add((student_id, activity_id))
+            moves[(student_id, activity_id)] = deque()
+        elif (student_id, activity_id) in priority_moves:
+            priority_moves.remove((student_id, activity_id))
+        moves[(student_id, activity_id)].append(req_group_id)
+
+    # Overlaps file:
+
+    for group1_id, group2_id in zip(*overlaps):
+        if group1_id not in overlaps_matrix:
+            overlaps_matrix[group1_id] = set()
+        if group2_id not in overlaps_matrix:
+            overlaps_matrix[group2_id] = set()
+        overlaps_matrix[group1_id].add(group2_id)
+        overlaps_matrix[group2_id].add(group1_id)
+        if group1_id in group_student_dict and group2_id in group_student_dict:
+            for student_id in group_student_dict[group1_id].intersection(group_student_dict[group2_id]):
+                if student_id not in allowed_overlaps_by_student:
+                    allowed_overlaps_by_student[student_id] = set()
+                allowed_overlaps_by_student[student_id].add((group1_id, group2_id))
+                allowed_overlaps_by_student[student_id].add((group2_id, group1_id))
+
+
+# Print result
+
+def print_result(variables: Variables, filename='out.csv'):
+    student_activity_rows = [[
+        student["student_id"],
+        student["activity_id"],
+        student["swap_weight"],
+        student["group_id"],
+        student["new_group_id"]
+    ] for student in variables.student_activity_dict.values()]
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["student_id", "activity_id", "swap_weight", "group_id", "new_group_id"])
+        writer.writerows(student_activity_rows)
@@ -0,0 +1,123 @@
+import os
+import sys
+import tracemalloc
+from collections import deque
+from typing import Dict, List, Tuple
+
+from hmo.model import Constants, Variables
+
+
+# Sizes:
+
+def deep_size(obj, seen=None):
+    # bytes of obj and everything it holds, objects already in seen are not counted again
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += deep_size(obj.__dict__, seen)
+    return size
+
+
+def structure_sizes(variables: Variables, constants: Constants) -> List[Tuple[str, int]]:
+    # deep size of every structure of the state, largest first; strings shared between
+    # structures are counted in the first one that holds them
+    seen = set()
+    sizes = []
+    for owner_name, owner in (("variables", variables), ("constants", constants)):
+        for name, value in vars(owner).items():
+            if isinstance(value, (int, float, bool, str)) or value is None:
+                continue
+            if name in ("watchdog", "memory_report"):
+                continue
+            sizes.append((owner_name + "." + name, deep_size(value, seen)))
+    sizes.sort(key=lambda item: -item[1])
+    return sizes
+
+
+def current_memory():
+    # resident set size in bytes, or the traced size where /proc is not available
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+# Report:
+
+class MemoryReport:
+    """
+    tracemalloc totals after load and after every search phase (current and peak since the previous
+    phase), the largest allocation sites and the deep size of every state structure.
+    """
+
+    def __init__(self):
+        tracemalloc.start()
+        self.phases: Dict[str, List[int]] = {}  # label -> [calls, largest current, largest peak]
+
+    def phase(self, label: str):
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        calls, largest_current, largest_peak = self.phases.get(label, [0, 0, 0])
+        self.phases[label] = [calls + 1, max(largest_current, current), max(largest_peak, peak)]
+
+    def print_structures(self, label: str, variables: Variables, constants: Constants, number=12):
+        current, peak = tracemalloc.get_traced_memory()
+        print("memory after ", label, ": current ", megabytes(current), " MB, peak ", megabytes(peak), " MB")
+        for name, size in structure_sizes(variables, constants)[:number]:
+            print("    ", name, " ", megabytes(size), " MB")
+        print("  largest allocation sites:")
+        for statistic in tracemalloc.take_snapshot().statistics('lineno')[:5]:
+            print("    ", statistic)
+
+    def print_phases(self):
+        print("memory by phase (calls, largest current MB, largest peak MB):")
+        for label, (calls, largest_current, largest_peak) in self.phases.items():
+            print("    ", label, " ", calls, " ", megabytes(largest_current), " ", megabytes(largest_peak))
+
+
+def megabytes(size):
+    return round(size / 2 ** 20, 1)
+
+
+# Budget:
+
+def compact_allowed_overlaps(constants: Constants):
+    # one tuple per overlapping pair and one set per distinct set of pairs, shared by the students
+    pairs = {}
+    sets = {}
+    for student_id, allowed_overlaps in constants.allowed_overlaps_by_student.items():
+        shared_pairs = frozenset(pairs.setdefault(pair, pair) for pair in allowed_overlaps)
+        constants.allowed_overlaps_by_student[student_id] = sets.setdefault(shared_pairs, shared_pairs)
+
+
+def check_memory(label: str, variables: Variables, constants: Constants):
+    """
+    Called after load and after every phase: records the phase for the memory report and, over the
+    memory limit, gives up one saving at a time: compact overlap pairs, the candidate index,
+    the group index.
+    """
+    if constants.memory_report is not None:
+        constants.memory_report.phase(label)
+    if constants.memory_limit is None or current_memory() <= constants.memory_limit:
+        return
+    if not constants.overlaps_compacted:
+        compact_allowed_overlaps(constants)
+        constants.overlaps_compacted = True
+        print("memory limit: compacted allowed overlaps after ", label)
+    elif constants.use_candidates:
+        constants.use_candidates = False
+        variables.candidates = None
+        print("memory limit: dropped the candidate index after ", label)
+    elif constants.use_group_index:
+        constants.use_group_index = False
+        variables.group_index = None
+        print("memory limit: dropped the group index after ", label)
@@ -0,0 +1,112 @@
+from time import time
+from typing import Tuple, Dict, Set, List, Deque
+
+
+# Types and classes:
+
+LookupTable = Dict[str, Set[str]]
+MovesDict = Dict[Tuple[str, str], Deque[str]]
+
+
+class Constants:
+    def __init__(self):
+        self.program_start = time()
+        self.timeout = 0
+        self.output_reserve = 1  # seconds kept for writing the result
+        self.check_interval = 0.005
+        self.check_every = 1
+        self.checks_left = 0
+        self.last_check = self.program_start
+        self.program_ended = False
+        self.slice_end = None  # time a deep make_best_move search gives up at
+        self.slice_ended = False
+        self.watchdog = None  # Watchdog, checkpointed by solve
+        self.lns = False
+        self.stagnation_iterations = 3  # iterations without a new best before a perturbation
+        self.stagnation_time = 10.0  # or seconds without a new best
+        self.kick_fraction = 0.3  # part of an activity's moved students a perturbation sends back
+        self.elite_size = 5  # local optima kept for path relinking
+        self.elite_min_distance = 10  # entries by which elite assignments differ at least
+        self.compound_limit = 1000  # most group combinations tried for one student
+        # tunable, see hmo/tuning.py:
+        self.enough_room_base = 2  # enough_room = base + factor * sqrt(average free seats)
+        self.enough_room_factor = 2.0
+        self.sample_base = 10  # make_best_move samples part = base + sqrt(moves) keys...
+        self.priority_factor = 3  # ...and priority_factor parts of best ranked keys
+        self.sample_threshold = 500  # more moves than this are sampled
+        self.depth_thresholds = []  # seconds left from which the search goes one level deeper, e.g. [30, 180]
+        self.memory_report = None  # MemoryReport, records memory after every phase
+        self.memory_limit = None  # bytes; over it, solve gives up compact-able and optional structures
+        self.overlaps_compacted = False
+        self.use_candidates = True  # CandidateIndex for the samples of make_best_move
+        self.use_group_index = True  # GroupIndex for the sweeps of make_valid_moves
+        self.award_activity: List[int] = []
+        self.award_student = 0
+        self.minmax_penalty = 0
+        self.groups_by_activity: LookupTable = {}
+        self.students_by_activity: LookupTable = {}
+        self.activities_by_student: LookupTable = {}
+        self.requests_set: Set[Tuple[str, str, str]] = set()
+        self.request_groups: Dict[Tuple[str, str], Set[str]] = {}
+        self.requested_activities_per_student: Dict[str, int] = {}
+        self.overlaps_matrix: LookupTable = {}
+        self.allowed_overlaps_by_student: Dict[str, Set[Tuple[str, str]]] = {}
+        self.gain_bounds: Dict[Tuple[str, str, str], int] = {}  # (s, a, g) -> optimistic score change
+        self.upper_bound = None  # optimistic score of the instance, computed before the search
+        self.request_targets: Dict[Tuple[str, str], Tuple[str, ...]] = {}  # (s, a) -> live requested groups
+
+    def get_deadline(self):
+        return self.program_start + self.timeout - self.output_reserve
+
+    def is_program_end(self):
+        # program_ended is raised by the watchdog at the deadline; without one, the clock is read
+        # once every check_every calls, check_every follows the call rate so that reads are about
+        # check_interval seconds apart
+        if self.program_ended or self.slice_ended:
+            return True
+        self.checks_left -= 1
+        if self.checks_left > 0:
+            return False
+        now = time()
+        elapsed = now - self.last_check
+        if elapsed > 0:
+            # grow slowly, shrink at once: calls can suddenly get much more expensive
+            self.check_every = max(1, min(2 * self.check_every, 10000,
+                                          int(self.check_every * self.check_interval / elapsed)))
+        time_left = self.get_deadline() - now
+        if time_left < 20 * self.check_interval:
+            self.check_every = 1
+        self.checks_left = self.check_every
+        self.last_check = now
+        self.program_ended = time_left < 0
+        self.slice_ended = self.slice_end is not None and now > self.slice_end
+        return self.program_ended or self.slice_ended
+
+    def get_depth(self):
+        # lookahead of make_best_move, one level more per threshold the time left still exceeds
+        # (none by default, so depth 0); going back searches one level deeper still
+        time_left = self.get_deadline() - time()
+        return sum(1 for threshold in self.depth_thresholds if time_left >= threshold)
+
+
+class Variables:
+    def __init__(self):
+        self.student_activity_dict: Dict[Tuple[str, str], dict] = {}
+        self.student_groups_dict: LookupTable = {}
+        self.group_student_dict: LookupTable = {}
+        # priority_moves: pairs with only one possibility
+        # for groups that have enough_room
+        self.priority_moves: Set[Tuple[str, str]] = set()
+        self.moves: MovesDict = {}
+        self.groups_dict: Dict[str, dict] = {}
+        self.requests_by_student: Dict[str, Dict[Tuple[str, str], str]] = {}  # s -> (g1, g2) -> a
+        # NOT UPDATED VIA MOVE:
+        self.valid_requested_groups_by_student: Dict[str, Dict[str, str]] = {}  # s -> g -> a
+        self.collision_requested_groups_by_student: Dict[str, Dict[str, str]] = {}  # s -> g -> a
+        self.maxed_requested_groups_by_student: Dict[str, Dict[str, str]] = {}  # s -> g -> a
+        self.mined_requested_groups_by_student: Dict[str, Dict[str, str]] = {}  # s -> g -> a
+        self.global_moves_made: Set[Tuple[str, str]] = set()  # (s, a)
+        self.enough_room = 5
+        self.candidates = None  # CandidateIndex, built on first use by make_best_move
+        self.group_index = None  # GroupIndex, built by make_valid_moves
+        self.trail = None  # Trail, journal of moves while a mark is set
@@ -0,0 +1,105 @@
+from collections import deque
+
+from hmo.model import Constants, Variables
+
+
+def make_move(student_id: str, activity_id: str, new_group_id: str, old_group_id: str, variables: Variables):
+    if variables.trail is not None and variables.trail.marks:
+        variables.trail.entries.append((True, student_id, activity_id, new_group_id, old_group_id))
+    variables.groups_dict[old_group_id]["students_cnt"] -= 1
+    variables.groups_dict[new_group_id]["students_cnt"] += 1
+
+    variables.requests_by_student[student_id].pop((old_group_id, new_group_id))
+    student_requests_copy = set(variables.requests_by_student[student_id].keys())
+    for current_group_id, req_group_id in student_requests_copy:
+        if current_group_id == old_group_id:
+            variables.requests_by_student[student_id].pop((old_group_id, req_group_id))
+            variables.requests_by_student[student_id][(new_group_id, req_group_id)] = activity_id
+
+    if (student_id, activity_id) in variables.priority_moves:
+        variables.priority_moves.remove((student_id, activity_id))
+    key_removed = len(variables.moves[(student_id, activity_id)]) == 1
+    if key_removed:
+        variables.moves.pop((student_id, activity_id))  # it was the only one so no going back (unless undo)
+    else:
+        variables.moves[(student_id, activity_id)].remove(new_group_id)
+        # variables.moves[(student_id, activity_id)].append(old_group_id) -- remove comment if you want to return
+    if variables.candidates is not None:
+        variables.candidates.remove_target((student_id, activity_id), new_group_id, key_removed)
+        variables.candidates.touch((student_id, activity_id), old_group_id, new_group_id)
+    if variables.group_index is not None:
+        variables.group_index.remove_target((student_id, activity_id), new_group_id)
+        variables.group_index.moved((student_id, activity_id), old_group_id, new_group_id)
+
+    variables.student_activity_dict[(student_id, activity_id)]["new_group_id"] = new_group_id
+    variables.student_groups_dict[student_id].remove(old_group_id)
+    variables.student_groups_dict[student_id].add(new_group_id)
+
+
+def undo_move(student_id: str, activity_id: str, new_group_id: str, old_group_id: str, variables: Variables):
+    if variables.trail is not None and variables.trail.marks:
+        variables.trail.entries.append((False, student_id, activity_id, new_group_id, old_group_id))
+    variables.groups_dict[new_group_id]["students_cnt"] -= 1
+    variables.groups_dict[old_group_id]["students_cnt"] += 1
+
+    variables.requests_by_student[student_id][(old_group_id, new_group_id)] = activity_id
+    student_requests_copy = set(variables.requests_by_student[student_id].keys())
+    for current_group_id, req_group_id in student_requests_copy:
+        if current_group_id == new_group_id:
+            variables.requests_by_student[student_id].pop((new_group_id, req_group_id))
+            variables.requests_by_student[student_id][(old_group_id, req_group_id)] = activity_id
+
+    if (student_id, activity_id) not in variables.moves:
+        variables.moves[(student_id, activity_id)] = deque()
+        if variables.groups_dict[new_group_id]["students_cnt"] + variables.enough_room \
+                <= variables.groups_dict[new_group_id]["max"]:
+            variables.priority_moves.add((student_id, activity_id))
+    # else:  -- remove comment if you want to return
+    #     variables.moves[(student_id, activity_id)].remove(old_group_id)
+    variables.moves[(student_id, activity_id)].append(new_group_id)
+    if variables.candidates is not None:
+        variables.candidates.add_target((student_id, activity_id), new_group_id)
+        variables.candidates.touch((student_id, activity_id), old_group_id, new_group_id)
+    if variables.group_index is not None:
+        variables.group_index.add_target((student_id, activity_id), new_group_id)
+        variables.group_index.moved((student_id, activity_id), new_group_id, old_group_id)
+
+    variables.student_activity_dict[(student_id, activity_id)]["new_group_id"] = old_group_id
+    variables.student_groups_dict[student_id].remove(new_group_id)
+    variables.student_groups_dict[student_id].add(old_group_id)
+
+
+def assign_group(student_id: str, activity_id: str, group_id: str, variables: Variables, constants: Constants):
+    # put (student, activity) into any group and rebuild its pending requests from request_targets;
+    # indexes are not maintained, callers drop them
+    key = (student_id, activity_id)
+    student = variables.student_activity_dict[key]
+    old_group_id = student["new_group_id"]
+    if old_group_id == group_id:
+        return
+    variables.groups_dict[old_group_id]["students_cnt"] -= 1
+    variables.groups_dict[group_id]["students_cnt"] += 1
+    student["new_group_id"] = group_id
+    variables.student_groups_dict[student_id].remove(old_group_id)
+    variables.student_groups_dict[student_id].add(group_id)
+
+    targets = [target_id for target_id in constants.request_targets.get(key, ()) if target_id != group_id]
+    student_requests = variables.requests_by_student.get(student_id, {})
+    for pair in [pair for pair, pair_activity_id in student_requests.items() if pair_activity_id == activity_id]:
+        student_requests.pop(pair)
+    for target_id in targets:
+        student_requests[(group_id, target_id)] = activity_id
+    if student_requests:
+        variables.requests_by_student[student_id] = student_requests
+    else:
+        variables.requests_by_student.pop(student_id, None)
+
+    variables.priority_moves.discard(key)
+    if targets:
+        variables.moves[key] = deque(targets)
+        if len(targets) == 1:
+            group = variables.groups_dict[targets[0]]
+            if group["students_cnt"] + variables.enough_room <= group["max"]:
+                variables.priority_moves.add(key)
+    else:
+        variables.moves.pop(key, None)
@@ -0,0 +1,46 @@
+import random
+
+from hmo.constraints import is_move_possible
+from hmo.model import Constants, Variables
+from hmo.moves import assign_group
+
+
+# Perturbation (iterated local search):
+
+def perturb(variables: Variables, constants: Constants):
+    """
+    Send a random part of the moved students of one activity back to their input groups,
+    so local search can rebuild that activity differently. Returns the number of students sent back.
+    """
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    moved_by_activity = {}
+    for key in variables.global_moves_made:
+        student = student_activity_dict.get(key)
+        if student is None or student["new_group_id"] == student["group_id"]:
+            continue
+        if student["new_group_id"] not in groups_dict or student["group_id"] not in groups_dict:
+            continue  # an activity outside this component (decompose workers only hold their own groups)
+        moved_by_activity.setdefault(key[1], []).append(key)
+    if not moved_by_activity:
+        return 0
+
+    activity_id = random.choice(sorted(moved_by_activity))
+    keys = moved_by_activity[activity_id]
+    kicked_number = max(min(len(keys), 3), int(len(keys) * constants.kick_fraction))
+    kicked = 0
+    for student_id, _ in random.sample(keys, kicked_number):
+        student = student_activity_dict[(student_id, activity_id)]
+        if not is_move_possible(student_id, activity_id, groups_dict[student["new_group_id"]],
+                                groups_dict[student["group_id"]], variables.student_groups_dict[student_id],
+                                variables, constants):
+            continue
+        assign_group(student_id, activity_id, student["group_id"], variables, constants)
+        variables.global_moves_made.discard((student_id, activity_id))
+        kicked += 1
+
+    # assign_group does not keep the indexes
+    variables.candidates = None
+    variables.group_index = None
+    print("Perturbed activity ", activity_id, ", students sent back ", kicked)
+    return kicked
@@ -0,0 +1,146 @@
+from typing import Dict, Set, Tuple
+
+from hmo.constraints import is_move_possible
+from hmo.loader import read_requests
+from hmo.model import Constants, Variables
+from hmo.moves import assign_group
+from hmo.scoring import move_delta, student_swap_stats
+
+
+# Static request pruning:
+
+def remove_request(student_id, activity_id, req_group_id, variables: Variables):
+    key = (student_id, activity_id)
+    current_group_id = variables.student_activity_dict[key]["new_group_id"]
+    variables.requests_by_student[student_id].pop((current_group_id, req_group_id))
+    if len(variables.requests_by_student[student_id]) == 0:
+        variables.requests_by_student.pop(student_id)
+    variables.moves[key].remove(req_group_id)
+    if len(variables.moves[key]) == 0:
+        variables.moves.pop(key)
+        variables.priority_moves.discard(key)
+    elif len(variables.moves[key]) == 1:
+        group = variables.groups_dict[variables.moves[key][0]]
+        if group["students_cnt"] + variables.enough_room <= group["max"]:
+            variables.priority_moves.add(key)
+
+
+def prune_requests(variables: Variables, constants: Constants) -> Dict[str, int]:
+    """
+    Remove pending requests that can never become legal:
+    - "full": the target stays at max even if everyone who may leave it leaves
+    - "overlap": the target overlaps a group of one of the student's activities that cannot move
+    Removing one can make others dead too, so repeat until nothing changes. A student may leave a group
+    if they have a pending move or are not in their input group (perturb and re-solves send them back).
+    """
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    overlaps_matrix = constants.overlaps_matrix
+    allowed_overlaps_by_student = constants.allowed_overlaps_by_student
+    pruned = {"full": 0, "overlap": 0}
+
+    changed = True
+    while changed:
+        changed = False
+
+        departures: Dict[str, int] = {}
+        for key, student in student_activity_dict.items():
+            if key in variables.moves or student["new_group_id"] != student["group_id"]:
+                departures[student["new_group_id"]] = departures.get(student["new_group_id"], 0) + 1
+
+        for (student_id, activity_id), group_ids in list(variables.moves.items()):
+            fixed_groups = [student_activity_dict[(student_id, other_activity_id)]["new_group_id"]
+                            for other_activity_id in constants.activities_by_student[student_id]
+                            if other_activity_id != activity_id
+                            and (student_id, other_activity_id) not in variables.moves
+                            and student_activity_dict[(student_id, other_activity_id)]["new_group_id"]
+                            == student_activity_dict[(student_id, other_activity_id)]["group_id"]]
+            allowed_overlaps = allowed_overlaps_by_student.get(student_id, ())
+            for req_group_id in list(group_ids):
+                group = groups_dict[req_group_id]
+                lowest_cnt = max(group["min"], group["students_cnt"] - departures.get(req_group_id, 0))
+                if lowest_cnt >= group["max"]:
+                    reason = "full"
+                elif any(fixed_group_id in overlaps_matrix.get(req_group_id, ())
+                         and (fixed_group_id, req_group_id) not in allowed_overlaps
+                         for fixed_group_id in fixed_groups):
+                    reason = "overlap"
+                else:
+                    continue
+                remove_request(student_id, activity_id, req_group_id, variables)
+                pruned[reason] += 1
+                changed = True
+
+    for reason, count in pruned.items():
+        print("Pruned ", reason, " requests ", count)
+    return pruned
+
+
+# Re-solve after the requests changed:
+
+def request_diff(previous_requests_file, variables: Variables, constants: Constants):
+    # (added, withdrawn) (student, activity, group) requests of the loaded requests file
+    requests = read_requests(previous_requests_file)
+    previous_requests = {(student_id, activity_id, req_group_id)
+                         for student_id, activity_id, req_group_id in zip(*requests)
+                         if (student_id, activity_id) in variables.student_activity_dict}
+    return constants.requests_set - previous_requests, previous_requests - constants.requests_set
+
+
+def undo_withdrawn_requests(withdrawn: Set[Tuple[str, str, str]], variables: Variables, constants: Constants):
+    """
+    Send students still sitting in a group whose request was withdrawn back to their input group,
+    where capacities and overlaps allow it and the score does not get worse; the rest are left
+    to the search. Returns (sent back, kept) counts.
+    """
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    # assign_group rebuilds pending requests from request_targets, solve recomputes them later
+    constants.request_targets = {key: tuple(group_ids) for key, group_ids in variables.moves.items()}
+    sent_back = 0
+    kept = 0
+    for student_id, activity_id, group_id in sorted(withdrawn):
+        student = student_activity_dict[(student_id, activity_id)]
+        current_group_id = student["new_group_id"]
+        if current_group_id != group_id or current_group_id == student["group_id"] \
+                or (student_id, activity_id, current_group_id) in constants.requests_set:
+            continue
+        delta = move_delta(student_id, activity_id, current_group_id, student["group_id"],
+                           student_swap_stats(student_id, variables, constants), variables, constants)
+        if delta >= 0 and is_move_possible(student_id, activity_id, groups_dict[current_group_id],
+                                           groups_dict[student["group_id"]],
+                                           variables.student_groups_dict[student_id], variables, constants):
+            assign_group(student_id, activity_id, student["group_id"], variables, constants)
+            variables.global_moves_made.discard((student_id, activity_id))
+            sent_back += 1
+        else:
+            kept += 1
+    constants.request_targets = {}
+    print("Withdrawn requests undone ", sent_back, ", kept ", kept)
+    return sent_back, kept
+
+
+def focus_on_students(student_ids: Set[str], variables: Variables, constants: Constants):
+    """
+    Keep only the pending requests that can interact with the given students: their own, and those
+    leaving or entering a group their activities are in or could move to.
+    """
+    student_activity_dict = variables.student_activity_dict
+    touched_groups = set()
+    for student_id in student_ids:
+        for activity_id in constants.activities_by_student.get(student_id, ()):
+            key = (student_id, activity_id)
+            touched_groups.add(student_activity_dict[key]["new_group_id"])
+            touched_groups.update(variables.moves.get(key, ()))
+    removed = 0
+    for (student_id, activity_id), group_ids in list(variables.moves.items()):
+        if student_id in student_ids:
+            continue
+        if student_activity_dict[(student_id, activity_id)]["new_group_id"] in touched_groups \
+                or any(group_id in touched_groups for group_id in group_ids):
+            continue
+        for req_group_id in list(group_ids):
+            remove_request(student_id, activity_id, req_group_id, variables)
+            removed += 1
+    print("Requests outside the affected students' groups set aside ", removed)
+    return removed
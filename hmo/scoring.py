@@ -0,0 +1,253 @@
+from typing import Tuple, Dict
+
+from hmo.model import Constants, Variables
+
+
+def score_a(variables: Variables, constants: Constants):
+    student_activity_dict = variables.student_activity_dict
+    requests_set = constants.requests_set
+
+    score = 0
+    for (student_id, activity_id), student_activity in student_activity_dict.items():
+        if student_activity["new_group_id"] != student_activity["group_id"] \
+                and (student_id, activity_id, student_activity["new_group_id"]) in requests_set:
+            score += student_activity["swap_weight"]
+    return score
+
+
+def score_b(variables: Variables, constants: Constants):
+    student_activity_dict = variables.student_activity_dict
+    award_activity = constants.award_activity
+
+    activity_swaps_per_student = {}
+    for (student_id, activity_id), student_activity in student_activity_dict.items():
+        if student_id not in activity_swaps_per_student:
+            activity_swaps_per_student[student_id] = set()
+        if student_activity["new_group_id"] != student_activity["group_id"]:
+            activity_swaps_per_student[student_id].add(activity_id)
+
+    score = 0
+    awards_number = len(award_activity)
+    for activity_swaps in activity_swaps_per_student.values():
+        swap_number = len(activity_swaps) - 1
+        if swap_number == -1:
+            continue
+        if swap_number < awards_number:
+            score += award_activity[swap_number]
+        else:
+            score += award_activity[-1]
+
+    return score
+
+
+def score_c(variables: Variables, constants: Constants):
+    student_activity_dict = variables.student_activity_dict
+    requests_set = constants.requests_set
+    requested_activities_per_student = constants.requested_activities_per_student
+    award_student = constants.award_student
+
+    satisfied_activities_per_student: Dict[str, int] = {}
+    for (student_id, activity_id), student_activity in student_activity_dict.items():
+        if student_activity["new_group_id"] != student_activity["group_id"] \
+                and (student_id, activity_id, student_activity["new_group_id"]) in requests_set:
+            if student_id not in satisfied_activities_per_student:
+                satisfied_activities_per_student[student_id] = 0
+            satisfied_activities_per_student[student_id] += 1
+
+    satisfied_students_counter = 0
+    for student_id, activity_number in requested_activities_per_student.items():
+        if student_id not in satisfied_activities_per_student:
+            continue
+        if satisfied_activities_per_student[student_id] == activity_number:
+            satisfied_students_counter += 1
+
+    return satisfied_students_counter * award_student
+
+
+def score_d(variables: Variables, constants: Constants):
+    groups_dict = variables.groups_dict
+    minmax_penalty = constants.minmax_penalty
+    return minmax_penalty * sum([group["min_preferred"] - group["students_cnt"]
+                                 for group in groups_dict.values()
+                                 if group["students_cnt"] < group["min_preferred"]])
+
+
+def score_e(variables: Variables, constants: Constants):
+    groups_dict = variables.groups_dict
+    minmax_penalty = constants.minmax_penalty
+    return minmax_penalty * sum([group["students_cnt"] - group["max_preferred"]
+                                 for group in groups_dict.values()
+                                 if group["students_cnt"] > group["max_preferred"]])
+
+
+def score_total(variables: Variables, constants: Constants):
+    return score_a(variables, constants) + score_b(variables, constants) + score_c(variables, constants) \
+        - score_d(variables, constants) - score_e(variables, constants)
+
+
+# Bounds:
+
+def compute_gain_bounds(variables: Variables, constants: Constants):
+    # optimistic score change of moving (s, a) into a requested group g, valid in any state:
+    # swap weight + best marginal activity award + student award + leaving an over-full group
+    # + joining an under-filled one; a request for the input group is a move back, which can only
+    # gain from one swap less and from the two groups
+    award_activity = constants.award_activity
+    activity_award = max([0, award_activity[0]] + [award_activity[k] - award_activity[k - 1]
+                                                   for k in range(1, len(award_activity))])
+    activity_award_drop = max([0, -award_activity[0]] + [award_activity[k - 1] - award_activity[k]
+                                                         for k in range(1, len(award_activity))])
+    student_award = max(0, constants.award_student)
+    groups_dict = variables.groups_dict
+    student_activity_dict = variables.student_activity_dict
+    minmax_penalty = constants.minmax_penalty
+
+    gain_bounds: Dict[Tuple[str, str, str], int] = {}
+    for student_id, activity_id, req_group_id in constants.requests_set:
+        student_activity = student_activity_dict[(student_id, activity_id)]
+        if req_group_id not in groups_dict:
+            continue  # outside of this (sub-)instance, nobody can move there
+        penalty_gain = minmax_penalty
+        if groups_dict[req_group_id]["min_preferred"] > 0:
+            penalty_gain += minmax_penalty
+        if req_group_id == student_activity["group_id"]:
+            gain_bounds[(student_id, activity_id, req_group_id)] = \
+                activity_award_drop + max(0, -constants.award_student) + penalty_gain
+            continue
+        gain_bounds[(student_id, activity_id, req_group_id)] = \
+            max(0, student_activity["swap_weight"]) + activity_award + student_award + penalty_gain
+    return gain_bounds
+
+
+def compute_upper_bound(variables: Variables, constants: Constants):
+    """
+    Optimistic score of anything the search can reach from the current state: every student gets
+    the best of its reachable swap weights and awards, every group the lowest penalty its reachable
+    counts allow, and no group takes in more students than it can hold.
+    """
+    student_activity_dict = variables.student_activity_dict
+    groups_dict = variables.groups_dict
+    requests_set = constants.requests_set
+    targets_by_key = constants.request_targets or variables.moves
+
+    # a key can leave its current group if it has a requested group to go to or is swapped,
+    # and it can enter its requested groups and its input group
+    departures: Dict[str, int] = {}
+    arrivals: Dict[str, int] = {}
+    entrant_weights: Dict[str, list] = {}
+    movable_by_student: Dict[str, int] = {}
+    satisfiable_by_student: Dict[str, int] = {}
+    weights_bound = 0
+    for key, student_activity in student_activity_dict.items():
+        student_id, activity_id = key
+        current_group_id = student_activity["new_group_id"]
+        swapped = current_group_id != student_activity["group_id"]
+        satisfied = swapped and (student_id, activity_id, current_group_id) in requests_set
+        if satisfied:
+            weights_bound += max(0, student_activity["swap_weight"])
+        targets = [group_id for group_id in targets_by_key.get(key, ()) if group_id != current_group_id]
+        if targets or swapped:
+            # a perturbation can also send a swapped student back to its input group
+            departures[current_group_id] = departures.get(current_group_id, 0) + 1
+            movable_by_student[student_id] = movable_by_student.get(student_id, 0) + 1
+            for group_id in targets + ([student_activity["group_id"]] if swapped else []):
+                arrivals[group_id] = arrivals.get(group_id, 0) + 1
+        if not satisfied:
+            for group_id in targets:
+                entrant_weights.setdefault(group_id, []).append(max(0, student_activity["swap_weight"]))
+        if targets or satisfied:
+            satisfiable_by_student[student_id] = satisfiable_by_student.get(student_id, 0) + 1
+
+    # swap weights: a group takes at most max - count + departures new students
+    for group_id, weights in entrant_weights.items():
+        group = groups_dict[group_id]
+        room = max(0, group["max"] - group["students_cnt"] + departures.get(group_id, 0))
+        weights.sort(reverse=True)
+        weights_bound += sum(weights[:room])
+
+    awards_bound = 0
+    for movable_number in movable_by_student.values():
+        # a student ends with at most as many swaps as activities that are swapped or can move
+        awards_bound += max(award_for_swaps(swaps_number, constants) for swaps_number in range(movable_number + 1))
+    for student_id, requested_number in constants.requested_activities_per_student.items():
+        if requested_number > 0 and satisfiable_by_student.get(student_id, 0) >= requested_number:
+            awards_bound += max(0, constants.award_student)
+
+    penalties_bound = 0
+    minmax_penalty = constants.minmax_penalty
+    for group_id, group in groups_dict.items():
+        students_cnt = group["students_cnt"]
+        lowest_cnt = max(students_cnt - departures.get(group_id, 0), min(students_cnt, group["min"]))
+        highest_cnt = min(students_cnt + arrivals.get(group_id, 0), max(students_cnt, group["max"]))
+        best_cnt = min(max(lowest_cnt, group["min_preferred"]), highest_cnt)
+        best_cnt = max(min(best_cnt, group["max_preferred"]), lowest_cnt)
+        penalties_bound += group_penalty(group, best_cnt, minmax_penalty)
+
+    return weights_bound + awards_bound - penalties_bound
+
+
+# Deltas:
+
+def award_for_swaps(swaps_number: int, constants: Constants):
+    if swaps_number <= 0:
+        return 0
+    award_activity = constants.award_activity
+    return award_activity[min(swaps_number, len(award_activity)) - 1]
+
+
+def student_swap_stats(student_id, variables: Variables, constants: Constants):
+    # (swapped activities, satisfied requests) of one student
+    student_activity_dict = variables.student_activity_dict
+    requests_set = constants.requests_set
+    swaps_number = 0
+    satisfied_number = 0
+    for activity_id in constants.activities_by_student[student_id]:
+        student_activity = student_activity_dict[(student_id, activity_id)]
+        if student_activity["new_group_id"] != student_activity["group_id"]:
+            swaps_number += 1
+            if (student_id, activity_id, student_activity["new_group_id"]) in requests_set:
+                satisfied_number += 1
+    return swaps_number, satisfied_number
+
+
+def group_penalty(group: dict, students_cnt: int, minmax_penalty: int):
+    penalty = 0
+    if students_cnt < group["min_preferred"]:
+        penalty += group["min_preferred"] - students_cnt
+    if students_cnt > group["max_preferred"]:
+        penalty += students_cnt - group["max_preferred"]
+    return minmax_penalty * penalty
+
+
+def move_delta(student_id, activity_id, old_group_id, new_group_id, swap_stats,
+               variables: Variables, constants: Constants):
+    # exact change of score_total if (student, activity) moves from old_group_id to new_group_id
+    student_activity = variables.student_activity_dict[(student_id, activity_id)]
+    requests_set = constants.requests_set
+    original_group_id = student_activity["group_id"]
+    swaps_number, satisfied_number = swap_stats
+
+    old_swapped = old_group_id != original_group_id
+    new_swapped = new_group_id != original_group_id
+    old_satisfied = old_swapped and (student_id, activity_id, old_group_id) in requests_set
+    new_satisfied = new_swapped and (student_id, activity_id, new_group_id) in requests_set
+
+    delta = (new_satisfied - old_satisfied) * student_activity["swap_weight"]
+
+    new_swaps_number = swaps_number - old_swapped + new_swapped
+    delta += award_for_swaps(new_swaps_number, constants) - award_for_swaps(swaps_number, constants)
+
+    requested_number = constants.requested_activities_per_student.get(student_id, 0)
+    if requested_number > 0:
+        new_satisfied_number = satisfied_number - old_satisfied + new_satisfied
+        delta += constants.award_student * ((new_satisfied_number == requested_number)
+                                            - (satisfied_number == requested_number))
+
+    minmax_penalty = constants.minmax_penalty
+    old_group = variables.groups_dict[old_group_id]
+    new_group = variables.groups_dict[new_group_id]
+    delta -= group_penalty(old_group, old_group["students_cnt"] - 1, minmax_penalty) \
+        - group_penalty(old_group, old_group["students_cnt"], minmax_penalty)
+    delta -= group_penalty(new_group, new_group["students_cnt"] + 1, minmax_penalty) \
+        - group_penalty(new_group, new_group["students_cnt"], minmax_penalty)
+    return delta
@@ -0,0 +1,447 @@
+import math
+import random
+from collections import deque
+from time import time
+from typing import Tuple, Set
+
+from hmo.batch import make_regret_moves
+from hmo.candidates import CandidateIndex
+from hmo.compound import make_student_moves
+from hmo.constraints import is_move_possible, is_move_possible_for_swap, is_state_possible
+from hmo.elite import ElitePool, path_relink
+from hmo.groups import GroupIndex
+from hmo.lns import make_lns_moves
+from hmo.memory import check_memory
+from hmo.model import Constants, Variables, MovesDict
+from hmo.moves import make_move, undo_move
+from hmo.perturb import perturb
+from hmo.scoring import score_total, compute_gain_bounds, compute_upper_bound
+from hmo.trail import Trail, Snapshot
+
+
+# Logic:
+
+def evaluate_move(student_id: str, activity_id: str, new_group_id: str,
+                  moves_made: Set[Tuple[str, str]],  # only top loop can decide to go back
+                  moves_sample: MovesDict,  # sample to evaluate the move on
+                  impossible_steps_allowed: bool,
+                  variables: Variables, constants: Constants, depth: int,
+                  score_bound=None,  # optimistic score of the state before this move
+                  incumbent=None,  # score the sequence has to beat
+                  sample_gain=0):  # optimistic gain of any single move from moves_sample
+    if score_bound is not None:
+        score_bound += constants.gain_bounds.get((student_id, activity_id, new_group_id), 0)
+        if score_bound + depth * sample_gain <= incumbent:
+            return None  # even the best case cannot beat the incumbent
+
+    old_group_id: str = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+    old_group = variables.groups_dict[old_group_id]
+    new_group = variables.groups_dict[new_group_id]
+    student_groups = variables.student_groups_dict[student_id]
+
+    if (not impossible_steps_allowed or depth < 2) \
+            and not is_move_possible(student_id, activity_id, old_group, new_group, student_groups,
+                                     variables, constants):
+        return None
+
+    if depth == 0:
+        if not is_move_possible(student_id, activity_id, old_group, new_group, student_groups, variables, constants):
+            return None
+        make_move(student_id, activity_id, new_group_id, old_group_id, variables)
+        if impossible_steps_allowed and not is_state_possible(variables, constants):
+            undo_move(student_id, activity_id, new_group_id, old_group_id, variables)
+            return None
+        score = score_total(variables, constants)
+        undo_move(student_id, activity_id, new_group_id, old_group_id, variables)
+        return score
+
+    make_move(student_id, activity_id, new_group_id, old_group_id, variables)
+    moves_made.add((student_id, activity_id))
+    score = None
+    for move_student_id, move_activity_id in moves_sample:
+        if constants.is_program_end():
+            break
+        if (move_student_id, move_activity_id) in moves_made:
+            continue
+        moves_copy = deque(variables.moves[(move_student_id, move_activity_id)])
+        for move_group_id in moves_copy:
+            move_group = variables.groups_dict[move_group_id]
+            if move_group["max"] <= move_group["students_cnt"]:
+                continue  # skip full groups
+            move_score = evaluate_move(move_student_id, move_activity_id, move_group_id,
+                                       set(moves_made), moves_sample, impossible_steps_allowed,
+                                       variables, constants, depth - 1,
+                                       score_bound, incumbent, sample_gain)
+            if move_score is None:
+                continue
+            if score is None or score < move_score:
+                score = move_score
+            break
+    undo_move(student_id, activity_id, new_group_id, old_group_id, variables)
+    return score
+
+
+def get_sample_gain(moves_sample, variables: Variables, constants: Constants):
+    gain_bounds = constants.gain_bounds
+    return max([gain_bounds.get((student_id, activity_id, group_id), 0)
+                for student_id, activity_id in moves_sample
+                if (student_id, activity_id) in variables.moves
+                for group_id in variables.moves[(student_id, activity_id)]], default=0)
+
+
+def make_best_move(variables, constants, best_score):
+    depth = constants.get_depth()
+    if depth == 0:
+        return search_best_move(variables, constants, best_score, depth)
+    # a deeper lookahead only runs while the time left stays above its threshold, then the best
+    # move found so far is made as at the program end
+    constants.slice_end = constants.get_deadline() - sorted(constants.depth_thresholds)[depth - 1]
+    try:
+        return search_best_move(variables, constants, best_score, depth)
+    finally:
+        constants.slice_end = None
+        constants.slice_ended = False
+
+
+def search_best_move(variables, constants, best_score, depth):
+    best_move = None
+    current_score = best_score
+
+    part_size = constants.sample_base + int(math.sqrt(len(variables.moves)))
+    if len(variables.moves) > constants.sample_threshold and constants.use_candidates:
+        if variables.candidates is None:
+            variables.candidates = CandidateIndex(variables)
+        evaluation_sample = variables.candidates.sample(part_size, constants.priority_factor)
+    elif len(variables.moves) > constants.sample_threshold:
+        # without the index: a random sample of the size the index would give
+        sample_size = min(len(variables.moves), (1 + constants.priority_factor) * part_size)
+        evaluation_sample = set(random.sample(list(variables.moves), sample_size))
+    else:
+        evaluation_sample = set(variables.moves)
+    sample_gain = get_sample_gain(evaluation_sample, variables, constants)
+
+    for student_id, activity_id in evaluation_sample:
+        if (student_id, activity_id) in variables.global_moves_made:
+            continue
+        if variables.group_index is not None and variables.group_index.is_blocked((student_id, activity_id)):
+            continue  # waiting on a closed group
+        moves_copy = deque(variables.moves[(student_id, activity_id)])
+        for group_id in moves_copy:
+
+            if constants.is_program_end():
+                if best_move is not None:
+                    student_id, activity_id, group_id = best_move
+                    old_group_id: str = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+                    make_move(student_id, activity_id, group_id, old_group_id, variables)
+                    variables.global_moves_made.add((student_id, activity_id))
+                    return True
+                else:
+                    return False
+
+            group = variables.groups_dict[group_id]
+            if group["max"] <= group["students_cnt"]:
+                continue  # skip full groups
+            score = evaluate_move(student_id, activity_id, group_id,
+                                  set(variables.global_moves_made), evaluation_sample, False,
+                                  variables, constants, depth,
+                                  current_score, best_score, sample_gain)
+            if score is None:
+                continue
+            if best_score < score:
+                best_score = score
+                best_move = (student_id, activity_id, group_id)
+            break   # a score is found, best to stop here
+
+    if best_move is not None:
+        print("Found a move")
+        student_id, activity_id, group_id = best_move
+        old_group_id: str = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+        make_move(student_id, activity_id, group_id, old_group_id, variables)
+        variables.global_moves_made.add((student_id, activity_id))
+        return True
+    else:
+        # no move found, try going back:
+        depth += 1  # if going back, probably needs deeper search
+        for student_id, activity_id in variables.global_moves_made:
+            if (student_id, activity_id) not in variables.moves:
+                continue  # was the only option for that, not going back
+            moves_copy = deque(variables.moves[(student_id, activity_id)])
+            for group_id in moves_copy:
+
+                if constants.is_program_end():
+                    if best_move is not None:
+                        student_id, activity_id, group_id = best_move
+                        old_group_id: str = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+                        make_move(student_id, activity_id, group_id, old_group_id, variables)
+                        variables.global_moves_made.add((student_id, activity_id))
+                        return True
+                    else:
+                        return False
+
+                score = evaluate_move(student_id, activity_id, group_id,
+                                      set(), evaluation_sample, True,
+                                      variables, constants, depth,
+                                      current_score, best_score, sample_gain)
+                if score is None:
+                    continue
+                if best_score < score:
+                    best_score = score
+                    best_move = (student_id, activity_id, group_id)
+        if best_move is not None:
+            print("Found a move by going back")
+            student_id, activity_id, group_id = best_move
+            old_group_id: str = variables.student_activity_dict[(student_id, activity_id)]["new_group_id"]
+            make_move(student_id, activity_id, group_id, old_group_id, variables)
+            variables.global_moves_made.add((student_id, activity_id))
+            return True
+
+    return False
+
+
+def add_to_validity_group(student_id, current_group_id, req_group_id, activity_id,
+                          variables: Variables, constants: Constants):
+    groups_dict = variables.groups_dict
+    student_groups_dict = variables.student_groups_dict
+    maxed_requested_groups_by_student = variables.maxed_requested_groups_by_student
+    mined_requested_groups_by_student = variables.mined_requested_groups_by_student
+    collision_requested_groups_by_student = variables.collision_requested_groups_by_student
+    valid_requested_groups_by_student = variables.valid_requested_groups_by_student
+    req_overlaps = constants.overlaps_matrix.get(req_group_id)
+
+    if groups_dict[req_group_id]["students_cnt"] >= groups_dict[req_group_id]["max"]:
+        maxed_requested_groups_by_student[student_id][req_group_id] = activity_id
+    elif groups_dict[current_group_id]["students_cnt"] <= groups_dict[current_group_id]["min"]:
+        mined_requested_groups_by_student[student_id][req_group_id] = activity_id
+    elif req_overlaps is not None and any([group_id in req_overlaps for group_id in student_groups_dict[student_id]]):
+        collision_requested_groups_by_student[student_id][req_group_id] = activity_id
+    else:
+        valid_requested_groups_by_student[student_id][req_group_id] = activity_id
+
+
+def compute_validity_groups(variables: Variables, constants: Constants):
+    for student_id, group_pair_dict in variables.requests_by_student.items():
+        variables.valid_requested_groups_by_student[student_id] = {}
+        variables.collision_requested_groups_by_student[student_id] = {}
+        variables.maxed_requested_groups_by_student[student_id] = {}
+        variables.mined_requested_groups_by_student[student_id] = {}
+        for (current_group_id, req_group_id), activity_id in group_pair_dict.items():
+            add_to_validity_group(student_id, current_group_id, req_group_id, activity_id, variables, constants)
+
+        if len(variables.valid_requested_groups_by_student[student_id]) == 0:
+            variables.valid_requested_groups_by_student.pop(student_id)
+        if len(variables.collision_requested_groups_by_student[student_id]) == 0:
+            variables.collision_requested_groups_by_student.pop(student_id)
+        if len(variables.maxed_requested_groups_by_student[student_id]) == 0:
+            variables.maxed_requested_groups_by_student.pop(student_id)
+        if len(variables.mined_requested_groups_by_student[student_id]) == 0:
+            variables.mined_requested_groups_by_student.pop(student_id)
+
+
+def make_valid_moves(variables: Variables, constants: Constants, best_score):
+    moved_counter = 0
+    if not constants.use_group_index:
+        # without the index every sweep goes over all keys
+        while not constants.is_program_end():
+            moved, best_score = make_regret_moves(variables, constants, best_score)
+            if moved == 0:
+                break
+            moved_counter += moved
+        print("Valid moves made ", moved_counter)
+        return moved_counter > 0, best_score
+
+    if variables.group_index is None:
+        variables.group_index = GroupIndex(variables, constants)
+
+    while not constants.is_program_end():
+        # only moves a change since the last sweep could have made feasible or improving
+        affected_keys = variables.group_index.pop_affected_keys()
+        if not affected_keys:
+            break
+        moved, best_score = make_regret_moves(variables, constants, best_score, affected_keys)
+        if moved == 0:
+            break
+        moved_counter += moved
+
+    print("Valid moves made ", moved_counter)
+    return moved_counter > 0, best_score
+
+
+def make_swap_moves(variables: Variables, constants: Constants, best_score):
+    any_swapped = False
+    swapped_counter = 0
+
+    for student1_id, groups_dict in variables.maxed_requested_groups_by_student.items():
+
+        requested_groups_by_student1 = {}
+        requested_groups_by_student1.update(groups_dict)
+        if student1_id in variables.mined_requested_groups_by_student:
+            requested_groups_by_student1.update(variables.mined_requested_groups_by_student[student1_id])
+
+        for new_group_id, activity_id in requested_groups_by_student1.items():
+            if constants.is_program_end():
+                return any_swapped, best_score
+
+            old_group_id = variables.student_activity_dict[(student1_id, activity_id)]["new_group_id"]
+
+            if new_group_id == old_group_id:
+                continue
+            if (old_group_id, new_group_id) not in variables.requests_by_student.get(student1_id, {}):
+                continue  # stale entry: an earlier swap of this pass moved the student out of old_group_id
+            if student1_id in variables.collision_requested_groups_by_student \
+                    and new_group_id in variables.collision_requested_groups_by_student[student1_id]:
+                continue
+
+            for student2_id in constants.students_by_activity[activity_id]:
+                if constants.is_program_end():
+                    return any_swapped, best_score
+
+                if student1_id == student2_id:
+                    continue
+                if (new_group_id, old_group_id) not in variables.requests_by_student.get(student2_id, {}):
+                    continue  # student2 is not in new_group_id or does not want old_group_id (any more)
+                if student2_id in variables.collision_requested_groups_by_student \
+                        and old_group_id in variables.collision_requested_groups_by_student[student2_id]:
+                    continue
+
+                requested_groups_by_student2 = {}
+                if student2_id in variables.maxed_requested_groups_by_student:
+                    requested_groups_by_student2.update(variables.maxed_requested_groups_by_student[student2_id])
+                if student2_id in variables.mined_requested_groups_by_student:
+                    requested_groups_by_student2.update(variables.mined_requested_groups_by_student[student2_id])
+
+                if old_group_id not in requested_groups_by_student2 \
+                        or requested_groups_by_student2[old_group_id] != activity_id:  # just in case
+                    continue
+
+                if not is_move_possible_for_swap(student1_id, activity_id,
+                                                 variables.groups_dict[old_group_id],
+                                                 variables.groups_dict[new_group_id],
+                                                 variables.student_groups_dict[student1_id],
+                                                 variables, constants) \
+                    or not is_move_possible_for_swap(student2_id, activity_id,
+                                                     variables.groups_dict[new_group_id],
+                                                     variables.groups_dict[old_group_id],
+                                                     variables.student_groups_dict[student2_id],
+                                                     variables, constants):
+                    continue
+
+                make_move(student1_id, activity_id, new_group_id, old_group_id, variables)
+                make_move(student2_id, activity_id, old_group_id, new_group_id, variables)
+
+                score = score_total(variables, constants)
+
+                if score > best_score:
+                    any_swapped = True
+                    best_score = score
+                    swapped_counter += 1
+                    variables.global_moves_made.add((student1_id, activity_id))
+                    variables.global_moves_made.add((student2_id, activity_id))
+                    break  # no further swaps for this group
+                else:
+                    undo_move(student1_id, activity_id, new_group_id, old_group_id, variables)
+                    undo_move(student2_id, activity_id, old_group_id, new_group_id, variables)
+
+    print("Swaps made ", swapped_counter)
+    return any_swapped, best_score
+
+
+def solve(variables: Variables, constants: Constants):
+    iteration = 0
+    algorithm_start = time()
+    best_score = score_total(variables, constants)
+    constants.gain_bounds = compute_gain_bounds(variables, constants)
+    if not constants.request_targets:
+        constants.request_targets = {key: tuple(group_ids) for key, group_ids in variables.moves.items()}
+    if constants.upper_bound is None:
+        constants.upper_bound = compute_upper_bound(variables, constants)
+    print("Upper bound: ", constants.upper_bound)
+    upper_bound = constants.upper_bound  # tightened at every kick, for the rest of the search only
+    variables.trail = Trail()
+    best = Snapshot(variables, best_score)
+    stagnant_iterations = 0
+    last_improvement = time()
+    elite = ElitePool(constants.elite_size, constants.elite_min_distance)
+    kicks = 0
+    check_memory("setup", variables, constants)
+    while not constants.is_program_end():
+        if best.score >= upper_bound:
+            print("Score meets the upper bound, stopping")
+            break
+        print("-----------------------------------------------------------------------")
+        any_improved = False
+        if constants.lns:
+            any_improved, best_score = make_lns_moves(variables, constants, best_score)
+            check_memory("lns", variables, constants)
+
+            if constants.is_program_end():
+                break
+
+        compute_validity_groups(variables, constants)
+        any_moved, best_score = make_valid_moves(variables, constants, best_score)
+        check_memory("valid", variables, constants)
+
+        if constants.is_program_end():
+            break
+
+        if any_moved:
+            compute_validity_groups(variables, constants)
+        any_swapped, best_score = make_swap_moves(variables, constants, best_score)
+        check_memory("swap", variables, constants)
+
+        if constants.is_program_end():
+            break
+
+        any_student_moved, best_score = make_student_moves(variables, constants, best_score)
+        check_memory("student", variables, constants)
+
+        if constants.is_program_end():
+            break
+
+        if not any_moved and not any_swapped and not any_improved and not any_student_moved:
+            made_move = make_best_move(variables, constants, best_score)
+            if made_move:
+                best_score = score_total(variables, constants)
+            check_memory("best move", variables, constants)
+
+        print("Current best score: ", best_score)
+        if best_score > best.score:
+            best.take(variables, best_score)
+            stagnant_iterations = 0
+            last_improvement = time()
+        else:
+            stagnant_iterations += 1
+        if constants.watchdog is not None:
+            constants.watchdog.checkpoint(best)
+
+        if stagnant_iterations >= constants.stagnation_iterations \
+                or time() - last_improvement > constants.stagnation_time:
+            # local search is stuck: keep the local optimum in the elite pool, go back to the best and
+            # leave it again, alternately towards another elite assignment and with a random kick
+            elite.add(Snapshot(variables, best_score))
+            if best_score < best.score:
+                best.restore(variables, constants)
+                best_score = best.score
+            kicks += 1
+            guide = elite.pick_guide(best) if kicks % 2 == 0 else None
+            relinked_score = path_relink(guide, best_score, variables, constants) if guide is not None else None
+            if relinked_score is not None:
+                best_score = relinked_score
+            elif perturb(variables, constants):
+                best_score = score_total(variables, constants)
+            stagnant_iterations = 0
+            last_improvement = time()
+            # everything the search reaches from here is reachable from the kicked state
+            kicked_bound = compute_upper_bound(variables, constants)
+            if kicked_bound < upper_bound:
+                upper_bound = kicked_bound
+                print("Upper bound after the kick: ", upper_bound)
+            check_memory("kick", variables, constants)
+        iteration += 1
+        print("-----------------------------------------------------------------------")
+
+    if best_score < best.score:
+        best.restore(variables, constants)
+        best_score = best.score
+    variables.trail = None
+    print(iteration, " iterations took  ", time() - algorithm_start, " seconds.")
+    return best_score
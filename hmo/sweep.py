@@ -0,0 +1,159 @@
+import copy
+import csv
+import multiprocessing
+from time import time
+from typing import Dict, List, Tuple
+
+from hmo.constraints import is_state_possible
+from hmo.deadline import measure_output_reserve, Watchdog
+from hmo.decompose import apply_changes
+from hmo.loader import print_result, read_students
+from hmo.model import Constants, Variables
+from hmo.moves import assign_group
+from hmo.scoring import score_a, score_b, score_c, score_d, score_e, compute_upper_bound
+from hmo.search import solve
+
+Configuration = Tuple[List[int], int, int]  # award_activity, award_student, minmax_penalty
+Assignment = Dict[Tuple[str, str], str]
+
+
+# Configurations:
+
+def read_configurations(filename) -> List[Configuration]:
+    # one configuration per line: award_activity award_student minmax_penalty, e.g. "1,2,4 1 1"
+    configurations = []
+    with open(filename) as file:
+        for line in file:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            award_activity, award_student, minmax_penalty = line.split()
+            configurations.append(([int(x) for x in award_activity.split(",")], int(award_student),
+                                   int(minmax_penalty)))
+    return configurations
+
+
+def configuration_distance(configuration1: Configuration, configuration2: Configuration):
+    award_activity1, award_student1, minmax_penalty1 = configuration1
+    award_activity2, award_student2, minmax_penalty2 = configuration2
+    length = max(len(award_activity1), len(award_activity2))
+    distance = sum(abs(award_activity1[min(i, len(award_activity1) - 1)]
+                       - award_activity2[min(i, len(award_activity2) - 1)]) for i in range(length))
+    return distance + abs(award_student1 - award_student2) + abs(minmax_penalty1 - minmax_penalty2)
+
+
+# Solve:
+
+def configuration_result(index, configuration: Configuration, variables: Variables, constants: Constants, filename):
+    # score table row and the changed assignment of a solved configuration
+    scores = [score_a(variables, constants), score_b(variables, constants), score_c(variables, constants),
+              score_d(variables, constants), score_e(variables, constants)]
+    row = [index, ",".join(str(x) for x in configuration[0]), configuration[1], configuration[2],
+           scores[0] + scores[1] + scores[2] - scores[3] - scores[4], constants.upper_bound] + scores \
+        + [is_state_possible(variables, constants), filename]
+    assignment = {key: student["new_group_id"] for key, student in variables.student_activity_dict.items()
+                  if student["new_group_id"] != student["group_id"]}
+    return row, assignment
+
+
+def solve_configuration(task, connection):
+    """
+    Solves one configuration in its own process and sends (row, assignment) over connection. Like a
+    single run, out_<i>.csv is written with the input assignment first and a watchdog ends the process
+    with the last checkpoint written if the search does not return in time; nothing is sent then.
+    """
+    index, configuration, variables, constants, warm_start, deadline = task
+    constants.award_activity, constants.award_student, constants.minmax_penalty = configuration
+
+    # warm start: apply the nearest solved assignment to the loaded state
+    for (student_id, activity_id), group_id in warm_start.items():
+        assign_group(student_id, activity_id, group_id, variables, constants)
+        variables.global_moves_made.add((student_id, activity_id))
+
+    filename = "out_" + str(index) + ".csv"
+    write_time = measure_output_reserve(variables, constants, filename)
+    constants.program_start = time()
+    constants.timeout = deadline - constants.program_start
+    constants.watchdog = Watchdog(variables, constants, write_time, filename)
+    constants.watchdog.start()
+    solve(variables, constants)
+    constants.watchdog.stop()
+    constants.watchdog = None
+
+    print_result(variables, filename)
+    connection.send(configuration_result(index, configuration, variables, constants, filename))
+    connection.close()
+
+
+def score_written(index, configuration: Configuration, variables: Variables, constants: Constants):
+    # result of a configuration whose process was ended by its watchdog, from the file it wrote
+    constants.award_activity, constants.award_student, constants.minmax_penalty = configuration
+    constants.upper_bound = compute_upper_bound(variables, constants)  # from the input assignment
+    filename = "out_" + str(index) + ".csv"
+    columns = read_students(filename)
+    apply_changes([((student_id, activity_id), new_group_id)
+                   for student_id, activity_id, new_group_id
+                   in zip(columns.student_id, columns.activity_id, columns.new_group_id)], variables)
+    return configuration_result(index, configuration, variables, constants, filename)
+
+
+def solve_sweep(configurations: List[Configuration], variables: Variables, constants: Constants, workers: int,
+                filename='sweep.csv'):
+    """
+    Solve every configuration on the one loaded instance. The first is solved from the input assignment,
+    the rest in waves of up to workers processes, each warm-started from the nearest configuration
+    already solved. Writes out_<i>.csv per configuration and a score table to filename.
+    """
+    constants.request_targets = {key: tuple(group_ids) for key, group_ids in variables.moves.items()}
+    loaded_variables = copy.deepcopy(variables)
+    loaded_constants = copy.copy(constants)
+
+    waves = [[0]] + [list(range(i, min(i + workers, len(configurations))))
+                     for i in range(1, len(configurations), workers)]
+    solved: List[Tuple[Configuration, Assignment]] = []
+    rows = []
+    context = multiprocessing.get_context('fork')
+    for wave_number, wave in enumerate(waves):
+        # time left is shared equally by the waves left, each solve keeps its own output reserve
+        deadline = time() + (constants.get_deadline() - time()) / (len(waves) - wave_number) \
+            + constants.output_reserve
+        tasks = []
+        for index in wave:
+            warm_start = {}
+            if solved:
+                warm_start = min(solved, key=lambda result: configuration_distance(result[0],
+                                                                                   configurations[index]))[1]
+            sub_constants = copy.copy(loaded_constants)
+            sub_constants.upper_bound = None
+            tasks.append((index, configurations[index], copy.deepcopy(loaded_variables), sub_constants,
+                          warm_start, deadline))
+
+        running = []
+        for task in tasks:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=solve_configuration, args=(task, sender))
+            process.start()
+            sender.close()
+            running.append((process, receiver, task))
+        results = []
+        for process, receiver, task in running:
+            try:
+                results.append(receiver.recv())
+            except EOFError:
+                results.append(score_written(task[0], task[1], copy.deepcopy(loaded_variables),
+                                             copy.copy(loaded_constants)))
+            process.join()
+
+        for index, (row, assignment) in zip(wave, results):
+            rows.append(row)
+            solved.append((configurations[index], assignment))
+
+    header = ["configuration", "award_activity", "award_student", "minmax_penalty", "score", "upper_bound",
+              "a", "b", "c", "d", "e", "possible", "output_file"]
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    for row in rows:
+        print(" ".join(str(value) for value in row))
+    return rows
@@ -0,0 +1,68 @@
+from typing import Dict, Tuple, List
+
+from hmo.model import Constants, Variables
+from hmo.moves import make_move, undo_move, assign_group
+
+
+class Trail:
+    """
+    Journal of make_move/undo_move calls made while at least one mark is set.
+    rollback(mark) replays the inverse of everything after the mark, newest first.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[bool, str, str, str, str]] = []
+        self.marks: List[int] = []
+
+    def mark(self):
+        self.marks.append(len(self.entries))
+        return self.marks[-1]
+
+    def release(self, mark: int):
+        # keep the changes since mark
+        self.marks.remove(mark)
+        if not self.marks:
+            self.entries = []
+
+    def rollback(self, mark: int, variables: Variables):
+        # undo the changes since mark, the mark stays set
+        entries = self.entries
+        variables.trail = None  # the replay itself is not journaled
+        while len(entries) > mark:
+            is_make, student_id, activity_id, new_group_id, old_group_id = entries.pop()
+            if is_make:
+                undo_move(student_id, activity_id, new_group_id, old_group_id, variables)
+            else:
+                make_move(student_id, activity_id, new_group_id, old_group_id, variables)
+        variables.trail = self
+        self.marks = [kept for kept in self.marks if kept <= mark]
+
+
+class Snapshot:
+    """An assignment stored as the (student, activity) -> group entries that differ from the input assignment."""
+
+    def __init__(self, variables: Variables, score=None):
+        self.changed: Dict[Tuple[str, str], str] = {}  # replaced as a whole, read by the watchdog
+        self.score = score
+        self.take(variables, score)
+
+    def take(self, variables: Variables, score):
+        self.changed = {key: student["new_group_id"] for key, student in variables.student_activity_dict.items()
+                        if student["new_group_id"] != student["group_id"]}
+        self.score = score
+
+    def assignment(self, variables: Variables):
+        # (student, activity) -> group for every entry
+        result = {key: student["group_id"] for key, student in variables.student_activity_dict.items()}
+        result.update(self.changed)
+        return result
+
+    def restore(self, variables: Variables, constants: Constants):
+        for key, group_id in self.assignment(variables).items():
+            if variables.student_activity_dict[key]["new_group_id"] != group_id:
+                assign_group(key[0], key[1], group_id, variables, constants)
+        # indexes and the journal describe the state that was left
+        variables.candidates = None
+        variables.group_index = None
+        if variables.trail is not None:
+            variables.trail = Trail()
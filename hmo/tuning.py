@@ -0,0 +1,70 @@
+import random
+from typing import Dict
+
+from hmo.model import Constants
+
+Parameters = Dict[str, object]
+
+# name -> (type, smallest, largest) of the tunable Constants fields; depth_thresholds is a list of
+# seconds-left values (none by default), random configurations get two
+PARAMETER_RANGES = {
+    "enough_room_base": (int, 0, 6),
+    "enough_room_factor": (float, 0.5, 4.0),
+    "sample_base": (int, 5, 40),
+    "priority_factor": (int, 1, 6),
+    "sample_threshold": (int, 100, 2000),
+    "depth_thresholds": (list, 5, 600),
+}
+
+
+# Parameters:
+
+def default_parameters() -> Parameters:
+    constants = Constants()
+    return {name: getattr(constants, name) for name in PARAMETER_RANGES}
+
+
+def random_parameters() -> Parameters:
+    parameters = {}
+    for name, (kind, smallest, largest) in PARAMETER_RANGES.items():
+        if kind is int:
+            parameters[name] = random.randint(smallest, largest)
+        elif kind is float:
+            parameters[name] = round(random.uniform(smallest, largest), 2)
+        else:
+            parameters[name] = sorted(random.randint(smallest, largest) for _ in range(2))
+    return parameters
+
+
+def apply_parameters(parameters: Parameters, constants: Constants):
+    for name, value in parameters.items():
+        setattr(constants, name, value)
+
+
+# Files:
+
+def read_parameters(filename) -> Parameters:
+    # one "name value" per line, e.g. "depth_thresholds 30,180"; names missing keep their defaults
+    parameters = {}
+    with open(filename) as file:
+        for line in file:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            name, *value = line.split()
+            value = value[0] if value else ""  # an empty list has no value
+            if name not in PARAMETER_RANGES:
+                raise ValueError("%s: unknown parameter %s" % (filename, name))
+            kind = PARAMETER_RANGES[name][0]
+            parameters[name] = [float(x) for x in value.split(",") if x] if kind is list else kind(value)
+    return parameters
+
+
+def write_parameters(filename, parameters: Parameters, comment=""):
+    with open(filename, 'w') as file:
+        if comment:
+            file.write("# " + comment + "\n")
+        for name, value in parameters.items():
+            if isinstance(value, list):
+                value = ",".join(str(x) for x in value)
+            file.write(name + " " + str(value) + "\n")
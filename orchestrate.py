@@ -0,0 +1,197 @@
+import argparse
+import copy
+import csv
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+from contextlib import redirect_stdout
+from time import time
+
+from hmo.constraints import is_state_possible
+from hmo.decompose import apply_changes
+from hmo.loader import load_instance, read_students, instance_files
+from hmo.model import Constants, Variables
+from hmo.preprocess import prune_requests
+from hmo.scoring import score_a, score_b, score_c, score_d, score_e, compute_upper_bound
+from program import solve_instance
+
+# instance -> (variables, constants) after loading and pruning, inherited by the forked jobs
+LOADED = {}
+
+
+# Parse:
+
+def parse_arguments():
+    parse = argparse.ArgumentParser(
+        description='Run every instance x timeout x seed job in parallel, one CPU and one directory per job.',
+        formatter_class=argparse.RawTextHelpFormatter)
+
+    parse.add_argument(
+        '-instances', '--instances',
+        dest='instances', default='i2,i3,i4,i5',
+        help='Instance directories under -data-dir, comma separated.')
+
+    parse.add_argument(
+        '-timeouts', '--timeouts',
+        dest='timeouts', default='600,1800,3600',
+        help='Timeouts in seconds, comma separated.')
+
+    parse.add_argument(
+        '-seeds', '--seeds',
+        dest='seeds', default='0',
+        help='Random seeds, comma separated.')
+
+    parse.add_argument(
+        '-award-activity', '--award-activity',
+        dest='award_activity', default='1,2,4',
+        help='Award activity.')
+
+    parse.add_argument(
+        '-award-student', '--award-student',
+        dest='award_student', default='1',
+        help='Award student.')
+
+    parse.add_argument(
+        '-minmax-penalty', '--minmax-penalty',
+        dest='minmax_penalty', default='1',
+        help='Minmax penalty.')
+
+    parse.add_argument(
+        '-lns', '--lns',
+        dest='lns', action='store_true',
+        help='Reoptimise one activity at a time exactly when local moves get stuck.')
+
+    parse.add_argument(
+        '-data-dir', '--data-dir',
+        dest='data_dir', default='data',
+        help='Directory with one sub-directory of input files per instance.')
+
+    parse.add_argument(
+        '-output-dir', '--output-dir',
+        dest='output_dir', default='output',
+        help='Jobs write <output-dir>/<instance>/<timeout>_s<seed>/out.csv and out.txt.')
+
+    parse.add_argument(
+        '-workers', '--workers',
+        dest='workers', default=os.cpu_count(),
+        help='Jobs running at the same time, each pinned to its own CPU.')
+
+    args = parse.parse_args()
+    return args
+
+
+# Jobs:
+
+def load(instance, data_dir, args):
+    constants = Constants()
+    variables = Variables()
+    constants.award_activity = [int(x) for x in args.award_activity.split(",")]
+    constants.award_student = int(args.award_student)
+    constants.minmax_penalty = int(args.minmax_penalty)
+    constants.lns = args.lns
+    load_instance(*instance_files(data_dir, instance), variables, constants)
+    prune_requests(variables, constants)
+    constants.upper_bound = compute_upper_bound(variables, constants)
+    return variables, constants
+
+
+def run_job(job, cpu):
+    instance, timeout, seed, job_dir = job
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+    random.seed(seed)
+
+    loaded_variables, loaded_constants = LOADED[instance]
+    variables = copy.deepcopy(loaded_variables)
+    constants = copy.copy(loaded_constants)
+    constants.program_start = time()
+    constants.timeout = timeout
+    with open(os.path.join(job_dir, "out.txt"), 'w') as out, redirect_stdout(out):
+        solve_instance(variables, constants, os.path.join(job_dir, "out.csv"))
+        print("program took: ", time() - constants.program_start, " seconds")
+
+
+def score_job(job):
+    # scores of the written file, so jobs ended by the watchdog are scored the same way
+    instance, timeout, seed, job_dir = job
+    loaded_variables, loaded_constants = LOADED[instance]
+    variables = copy.deepcopy(loaded_variables)
+    columns = read_students(os.path.join(job_dir, "out.csv"))
+    apply_changes([((student_id, activity_id), new_group_id)
+                   for student_id, activity_id, new_group_id
+                   in zip(columns.student_id, columns.activity_id, columns.new_group_id)], variables)
+    scores = [score_a(variables, loaded_constants), score_b(variables, loaded_constants),
+              score_c(variables, loaded_constants), score_d(variables, loaded_constants),
+              score_e(variables, loaded_constants)]
+    return [scores[0] + scores[1] + scores[2] - scores[3] - scores[4], loaded_constants.upper_bound] + scores \
+        + [is_state_possible(variables, loaded_constants)]
+
+
+def run_jobs(jobs, workers):
+    # longest jobs first, each started on a free CPU as soon as one is released
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count()))
+    free_cpus = cpus[:max(1, min(workers, len(cpus)))]
+    pending = sorted(jobs, key=lambda job: -job[1])
+    running = {}  # sentinel -> (process, job, cpu, start)
+    durations = {}
+    context = multiprocessing.get_context('fork')
+    while pending or running:
+        while pending and free_cpus:
+            job = pending.pop(0)
+            cpu = free_cpus.pop(0)
+            process = context.Process(target=run_job, args=(job, cpu))
+            process.start()
+            running[process.sentinel] = (process, job, cpu, time())
+            print("started ", job[0], job[1], "s seed", job[2], "on cpu", cpu)
+        for sentinel in multiprocessing.connection.wait(list(running)):
+            process, job, cpu, start = running.pop(sentinel)
+            process.join()
+            durations[job] = time() - start
+            free_cpus.append(cpu)
+            print("finished ", job[0], job[1], "s seed", job[2], "exit code", process.exitcode)
+    return durations
+
+
+def main():
+    args = parse_arguments()
+    instances = args.instances.split(",")
+    timeouts = [int(x) for x in args.timeouts.split(",")]
+    seeds = [int(x) for x in args.seeds.split(",")]
+
+    for instance in instances:
+        load_start = time()
+        LOADED[instance] = load(instance, args.data_dir, args)
+        print("loaded ", instance, " in ", time() - load_start, " seconds.")
+
+    jobs = []
+    for instance in instances:
+        for timeout in timeouts:
+            for seed in seeds:
+                job_dir = os.path.join(args.output_dir, instance, str(timeout) + "_s" + str(seed))
+                os.makedirs(job_dir, exist_ok=True)
+                jobs.append((instance, timeout, seed, job_dir))
+
+    campaign_start = time()
+    durations = run_jobs(jobs, int(args.workers))
+
+    header = ["instance", "timeout", "seed", "score", "upper_bound", "a", "b", "c", "d", "e", "possible",
+              "seconds", "output_file"]
+    rows = [[instance, timeout, seed] + score_job((instance, timeout, seed, job_dir))
+            + [round(durations[(instance, timeout, seed, job_dir)], 1), os.path.join(job_dir, "out.csv")]
+            for instance, timeout, seed, job_dir in jobs]
+    with open(os.path.join(args.output_dir, "summary.csv"), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    print(" ".join(header))
+    for row in rows:
+        print(" ".join(str(value) for value in row))
+    print("campaign took: ", time() - campaign_start, " seconds")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+#! /bin/bash
+
+export ARGS='-award-activity 1,2,4 -award-student 1 -minmax-penalty 1'
+
+check() {
+    if [ $1 -eq 0 ] && grep -q "possible?  True" regression.txt; then
+        printf '"%s - PASSED"\n' "$2"
+    else
+        printf '"%s - FAIL"\n' "$2"
+        tail -5 regression.txt
+    fi
+}
+
+# short i2 runs with fixed hash seeds; PYTHONHASHSEED=3 used to crash make_swap_moves on a stale
+# swap entry (KeyError in make_move)
+for SEED in 0 3 ; do
+    PYTHONHASHSEED=${SEED} python program.py -timeout 15 ${ARGS} -students-file data/i2/student.csv -requests-file data/i2/requests.csv -overlaps-file data/i2/overlaps.csv -limits-file data/i2/limits.csv > regression.txt 2>&1
+    check $? "i2 hash seed ${SEED}"
+done
+
+# decompose on an input with students already moved: the output of other weights; perturb in the
+# workers used to look up groups of other components (KeyError)
+PYTHONHASHSEED=0 python program.py -timeout 8 -award-activity 4,2,1 -award-student 5 -minmax-penalty 0 -students-file data/i5/student.csv -requests-file data/i5/requests.csv -overlaps-file data/i5/overlaps.csv -limits-file data/i5/limits.csv > regression.txt 2>&1
+mv out.csv regression_premoved.csv
+PYTHONHASHSEED=0 python program.py -timeout 20 -decompose -workers 4 ${ARGS} -students-file regression_premoved.csv -requests-file data/i5/requests.csv -overlaps-file data/i5/overlaps.csv -limits-file data/i5/limits.csv > regression.txt 2>&1
+check $? "i5 decompose on a pre-moved input"
+
+rm regression.txt
+rm regression_premoved.csv
+rm out.csv
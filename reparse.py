@@ -1,18 +1,23 @@
 import argparse
 import csv
-from typing import Tuple, Dict, Set, List, Deque
+import hashlib
+import heapq
+import os
+import tempfile
+from itertools import groupby
+from operator import itemgetter
 
+from hmo.loader import iterate_rows
 
-class Variables:
-    def __init__(self):
-        self.student_activity_dict: Dict[Tuple[str, str], dict] = {}
+HEADER = ["student_id", "activity_id", "swap_weight", "group_id", "new_group_id"]
 
 
 # Parse:
 
 def parse_arguments():
     parse = argparse.ArgumentParser(
-        description='',
+        description='Rewrite a students file in the output format, one row at a time, and print the\n'
+                    'sha256 of the written file; with -sort, equal solutions get equal checksums.',
         formatter_class=argparse.RawTextHelpFormatter)
 
     parse.add_argument(
@@ -20,62 +25,94 @@ def parse_arguments():
         dest='students_file', required=True,
         help='Students file.')
 
+    parse.add_argument(
+        '-output-file', '--output-file',
+        dest='output_file', default='r_output.csv',
+        help='Output file.')
+
+    parse.add_argument(
+        '-sort', '--sort',
+        dest='sort', action='store_true',
+        help='Write rows in (student_id, activity_id) order; of rows with the same key the last is kept.')
+
+    parse.add_argument(
+        '-chunk-rows', '--chunk-rows',
+        dest='chunk_rows', default='1000000',
+        help='Rows sorted in memory at a time; bigger files are sorted in runs on disk and merged.')
+
     args = parse.parse_args()
     return args
 
 
-def parse_student_row(row):
-    student = dict()
-    student["student_id"] = row[0]
-    student["activity_id"] = row[1]
-    student["swap_weight"] = int(row[2])
-    student["group_id"] = row[3]
-    student["new_group_id"] = row[4]
+# Rows:
 
-    return student
+def normalised_rows(filename):
+    for student_id, activity_id, swap_weight, group_id, new_group_id in iterate_rows(filename, 5):
+        # having 0 is the same as remaining in the same group
+        yield [student_id, activity_id, int(swap_weight), group_id,
+               group_id if new_group_id == "0" else new_group_id]
 
-# Print result
 
-def print_result(variables: Variables, filename):
-    student_activity_rows = [[
-        student["student_id"],
-        student["activity_id"],
-        student["swap_weight"],
-        student["group_id"],
-        student["new_group_id"]
-    ] for student in variables.student_activity_dict.values()]
-    with open(filename, 'w', newline='') as file:
+def write_run(rows, directory):
+    file = tempfile.NamedTemporaryFile('w', newline='', dir=directory, suffix='.csv', delete=False)
+    with file:
         writer = csv.writer(file)
-        writer.writerow(["student_id", "activity_id", "swap_weight", "group_id", "new_group_id"])
-        writer.writerows(student_activity_rows)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return file.name
+
+
+def read_run(filename):
+    for student_id, activity_id, swap_weight, group_id, new_group_id in iterate_rows(filename, 5):
+        yield [student_id, activity_id, int(swap_weight), group_id, new_group_id]
+
+
+def sorted_rows(rows, chunk_rows, directory):
+    """
+    External merge sort by (student_id, activity_id): sorted runs of chunk_rows rows are written to
+    directory and merged. Both sorts are stable, so rows with the same key stay in input order and
+    the last one is kept, as when the solution is loaded into a dict.
+    """
+    key = itemgetter(0, 1)
+    runs = []
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            chunk.sort(key=key)
+            runs.append(write_run(chunk, directory))
+            chunk = []
+    chunk.sort(key=key)
+    merged = heapq.merge(*[read_run(run) for run in runs], chunk, key=key) if runs else chunk
+    for _, same_key_rows in groupby(merged, key=key):
+        *_, row = same_key_rows
+        yield row
+
+
+class HashingWriter:
+    # file wrapper that hashes everything written through it
+    def __init__(self, file):
+        self.file = file
+        self.hash = hashlib.sha256()
+
+    def write(self, text):
+        self.hash.update(text.encode())
+        return self.file.write(text)
 
 
 def main():
     args = parse_arguments()
 
-    variables = Variables()
-
-    students_file = args.students_file
-
-    student_activity_dict = variables.student_activity_dict
-
-    with open(students_file, newline='') as studentsCsvFile:
-
-        # Students file:
-
-        student_rows = csv.reader(studentsCsvFile, delimiter=',', quotechar='|')
-        next(student_rows)  # skip header
-        for row in student_rows:
-            student = parse_student_row(row)
-            if student["new_group_id"] == "0":
-                student["new_group_id"] = student["group_id"]  # having 0 is the same as remaining in the same group
-            student_id, activity_id, new_group_id = \
-                student["student_id"], student["activity_id"], student["new_group_id"]
-
-            # Constants calculation:
-
-            student_activity_dict[(student_id, activity_id)] = student
-
-    print_result(variables, 'r_output.csv')
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(args.output_file))) as directory:
+        rows = normalised_rows(args.students_file)
+        if args.sort:
+            rows = sorted_rows(rows, int(args.chunk_rows), directory)
+        with open(args.output_file, 'w', newline='') as file:
+            output = HashingWriter(file)
+            writer = csv.writer(output)
+            writer.writerow(HEADER)
+            writer.writerows(rows)
+
+    print("checksum: sha256 ", output.hash.hexdigest())
 
 main()
@@ -0,0 +1,169 @@
+import argparse
+import multiprocessing
+import os
+import random
+from contextlib import redirect_stdout
+from time import time
+
+from hmo.deadline import start_deadline_timer
+from hmo.loader import load_instance, instance_files
+from hmo.model import Constants, Variables
+from hmo.preprocess import prune_requests
+from hmo.scoring import score_total
+from hmo.search import solve
+from hmo.tuning import default_parameters, random_parameters, apply_parameters, write_parameters
+
+
+# Parse:
+
+def parse_arguments():
+    parse = argparse.ArgumentParser(
+        description='Race solver parameter configurations over the instances with short budgets.\n'
+                    'Every round solves each instance once more with a new seed per configuration and\n'
+                    'drops the worse half; the best configuration left is written for program.py\n'
+                    '-parameters-file.',
+        formatter_class=argparse.RawTextHelpFormatter)
+
+    parse.add_argument(
+        '-instances', '--instances',
+        dest='instances', default='i2,i3,i4,i5',
+        help='Instance directories under -data-dir, comma separated. Settings differ by instance\n'
+             'size, so tune small and large instances separately.')
+
+    parse.add_argument(
+        '-timeout', '--timeout',
+        dest='timeout', default='20',
+        help='Seconds per solve. depth_thresholds only matter for timeouts above them.')
+
+    parse.add_argument(
+        '-configurations', '--configurations',
+        dest='configurations', default='16',
+        help='Configurations raced: the defaults and random ones.')
+
+    parse.add_argument(
+        '-seeds', '--seeds',
+        dest='seeds', default='0,1,2,3',
+        help='Random seeds, one per round, comma separated.')
+
+    parse.add_argument(
+        '-award-activity', '--award-activity',
+        dest='award_activity', default='1,2,4',
+        help='Award activity.')
+
+    parse.add_argument(
+        '-award-student', '--award-student',
+        dest='award_student', default='1',
+        help='Award student.')
+
+    parse.add_argument(
+        '-minmax-penalty', '--minmax-penalty',
+        dest='minmax_penalty', default='1',
+        help='Minmax penalty.')
+
+    parse.add_argument(
+        '-data-dir', '--data-dir',
+        dest='data_dir', default='data',
+        help='Directory with one sub-directory of input files per instance.')
+
+    parse.add_argument(
+        '-output-file', '--output-file',
+        dest='output_file', default='parameters.txt',
+        help='File the best configuration is written to.')
+
+    parse.add_argument(
+        '-workers', '--workers',
+        dest='workers', default=os.cpu_count(),
+        help='Solves running at the same time.')
+
+    args = parse.parse_args()
+    return args
+
+
+# Trials:
+
+def run_trial(trial):
+    instance, parameters, seed, args = trial
+    random.seed(seed)
+    constants = Constants()
+    variables = Variables()
+    constants.award_activity = [int(x) for x in args.award_activity.split(",")]
+    constants.award_student = int(args.award_student)
+    constants.minmax_penalty = int(args.minmax_penalty)
+    apply_parameters(parameters, constants)  # before loading, enough_room is computed by the loader
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        load_instance(*instance_files(args.data_dir, instance), variables, constants)
+        prune_requests(variables, constants)
+
+        constants.program_start = time()
+        constants.timeout = float(args.timeout)
+        constants.output_reserve = 0  # nothing is written
+        timer = start_deadline_timer(constants)
+        solve(variables, constants)
+        timer.cancel()
+    return score_total(variables, constants)
+
+
+def normalised_scores(scores):
+    # 1 for the best configuration of an instance and seed, 0 for the worst
+    best = max(scores)
+    worst = min(scores)
+    if best == worst:
+        return [1.0] * len(scores)
+    return [(score - worst) / (best - worst) for score in scores]
+
+
+def race(configurations, instances, seeds, args):
+    """
+    Successive halving: each round solves every instance with one seed for every configuration left,
+    then keeps the better half by mean normalised score over all rounds so far.
+    Returns the configurations left, best first, with their mean normalised scores.
+    """
+    totals = [0.0] * len(configurations)
+    blocks = 0
+    alive = list(range(len(configurations)))
+    context = multiprocessing.get_context('fork')
+    for round_number, seed in enumerate(seeds):
+        trials = [(instance, configurations[i], seed, args) for instance in instances for i in alive]
+        round_start = time()
+        with context.Pool(max(1, min(int(args.workers), len(trials)))) as pool:
+            scores = pool.map(run_trial, trials)
+
+        for j, instance in enumerate(instances):
+            block = scores[j * len(alive):(j + 1) * len(alive)]
+            for i, normalised in zip(alive, normalised_scores(block)):
+                totals[i] += normalised
+            print("round ", round_number, " ", instance, " scores ", block)
+        blocks += len(instances)
+
+        alive.sort(key=lambda i: -totals[i])
+        if round_number < len(seeds) - 1:
+            alive = alive[:max(1, (len(alive) + 1) // 2)]
+        print("round ", round_number, " took ", time() - round_start, " seconds, left ",
+              [(i, round(totals[i] / blocks, 3)) for i in alive])
+        if len(alive) == 1:
+            break
+    return [(configurations[i], totals[i] / blocks) for i in alive]
+
+
+def main():
+    args = parse_arguments()
+    instances = args.instances.split(",")
+    seeds = [int(x) for x in args.seeds.split(",")]
+
+    random.seed(seeds[0])
+    configurations = [default_parameters()] + [random_parameters()
+                                                for _ in range(int(args.configurations) - 1)]
+    for i, parameters in enumerate(configurations):
+        print(i, " ", parameters)
+
+    tuning_start = time()
+    (best, mean_score), *_ = race(configurations, instances, seeds, args)
+    print("best configuration: ", best, " mean normalised score ", mean_score)
+    write_parameters(args.output_file, best,
+                     "tuned on " + args.instances + " with " + args.timeout + " s budgets, mean normalised score "
+                     + str(round(mean_score, 3)))
+    print("tuning took: ", time() - tuning_start, " seconds")
+
+
+if __name__ == '__main__':
+    main()